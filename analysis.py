@@ -0,0 +1,203 @@
+# analysis.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import json
+import os
+import time
+
+import bitboard
+import gamelog
+import search
+import transposition
+
+# Time searched for each position by default, in seconds
+DEFAULT_MOVETIME = 0.1
+# Games given to each worker at once: more keep them busy, fewer use less memory
+WINDOW = 4
+# The checkpoint is written at most that often, in seconds
+CHECKPOINTPERIOD = 10.0
+
+# Search of a worker process, kept from game to game with its table
+_engine = None
+
+
+def _initworker(tablesize):
+    global _engine
+    _engine = search.QuartoSearch(tablesize=tablesize)
+
+
+def _movevalue(engine, board, move, depth):
+    # Value of the (pos, piece, quarto) 'move' searched 'depth' plies deep,
+    # a Quarto left on the board without announcing it losing right away
+    pos, piece, quarto = move
+    size = board.empty.bit_count()
+    board.place(pos)
+    won = board.hasquarto()
+    board.unplace(pos)
+    if won:
+        return search.SCORE + size if quarto else -(search.SCORE + size - 1)
+    return engine.rootvalue(board, (pos, piece), depth, -search.INFINITY, search.INFINITY)
+
+
+def analyzeposition(engine, board, played, movetime, maxdepth=None):
+    '''Compare a move with the best one.
+    Pre: 'engine' is a search.QuartoSearch, 'board' a QuartoBitboard with a piece
+         to place and 'played' the (pos, piece, quarto) triple played there.
+    Post: The returned value is a dict with the 'best' move as a triple, its
+          'value' and the 'playedvalue' of the move played, from the point of
+          view of the player, found by iterative deepening within 'movetime'
+          seconds and 'maxdepth' plies, the 'depth' reached and whether both
+          values are 'exact' (the position is solved or both are proven wins
+          or losses).
+    '''
+    engine.start(movetime)
+    size = board.empty.bit_count()
+    best = engine.immediatemove(board)
+    if best is not None:
+        # Only the move played is left to search
+        value = engine.value
+        moves = []
+    else:
+        moves = engine.rootmoves(board)
+        best = moves[0] + (False,)
+        value = 0
+    playedvalue = 0
+    depth = 0
+    for target in range(1, min(size, maxdepth or size) + 1):
+        try:
+            iterationbest, alpha = best, value
+            if moves:
+                alpha = -search.INFINITY
+                for move in moves:
+                    current = engine.rootvalue(board, move, target, alpha, search.INFINITY)
+                    if current > alpha:
+                        alpha = current
+                        iterationbest = move + (False,)
+            iterationplayed = _movevalue(engine, board, played, target)
+        except search.SearchTimeout:
+            break
+        best, value, playedvalue, depth = iterationbest, alpha, iterationplayed, target
+        if abs(value) > search.SCORE and abs(playedvalue) > search.SCORE:
+            break
+        moves.sort(key=lambda move: move != best[:2])
+    exact = depth >= size or abs(value) > search.SCORE and abs(playedvalue) > search.SCORE
+    return {'best': best, 'value': value, 'playedvalue': playedvalue, 'depth': depth, 'exact': exact}
+
+
+def analyzegame(engine, index, record, movetime, maxdepth=None):
+    '''List of the annotations (dicts written as JSON lines by Analyzer) of the
+    moves of the game number 'index' given by its gamelog.GameRecord.'''
+    annotations = []
+    for turn, (board, move) in enumerate(gamelog.replay(record, bitboard.QuartoBitboard)):
+        # Invalid moves, and the first move where all the pieces are equivalent
+        if move is None or board.piece == bitboard.NOPIECE:
+            continue
+        token = board.makemove(move)
+        played = (move['pos'], None if board.piece == bitboard.NOPIECE else board.piece, bool(move.get('quarto')))
+        board.unmakemove(token)
+        # A search interrupted by its deadline leaves its board as it was then
+        result = analyzeposition(engine, board.copy(), played, movetime, maxdepth)
+        annotations.append({
+            'game': index, 'turn': turn, 'player': board.currentplayer, 'played': move,
+            'best': board.tomove(*result['best']), 'value': result['value'],
+            'playedvalue': result['playedvalue'], 'drop': result['value'] - result['playedvalue'],
+            'depth': result['depth'], 'exact': result['exact']
+        })
+    return annotations
+
+
+def _analyzegame(index, record, movetime, maxdepth):
+    return analyzegame(_engine, index, record, movetime, maxdepth)
+
+
+class Analyzer:
+    '''Annotation of the moves of the games of a log (see gamelog.py).
+
+    Each position where a piece is placed is searched for 'movetime' seconds
+    (and at most 'maxdepth' plies), giving the best move, its value and the
+    value of the move played: the difference is the 'drop' of the move, big
+    for a blunder. Games are analysed by 'workers' processes, each keeping
+    its search and transposition table from game to game, and only a few of
+    them per worker are in flight at once, so that memory does not depend on
+    the size of the log. Annotations are written in the order of the games,
+    one JSON line per move, and a checkpoint (the number of games done and
+    the size of the output) is written regularly: an interrupted analysis
+    goes on from it when run again.
+    '''
+    def __init__(self, movetime=DEFAULT_MOVETIME, maxdepth=None, workers=None, tablesize=transposition.DEFAULT_SIZE):
+        self.movetime = movetime
+        self.maxdepth = maxdepth
+        self.workers = workers or os.cpu_count() or 1
+        self.tablesize = tablesize
+
+    def run(self, logpath, outputpath, checkpointpath=None, verbose=False):
+        '''Analyse the games of the log 'logpath' (with its rotated files) into 'outputpath'.
+        Post: The returned value is the number of games analysed by this run. The
+              checkpoint ('outputpath.checkpoint' by default) is removed at the end.
+        '''
+        checkpointpath = checkpointpath or outputpath + '.checkpoint'
+        done, offset = 0, 0
+        if os.path.exists(checkpointpath):
+            with open(checkpointpath) as file:
+                checkpoint = json.load(file)
+            done, offset = checkpoint['games'], checkpoint['offset']
+        mode = 'r+' if done and os.path.exists(outputpath) else 'w'
+        with open(outputpath, mode) as output:
+            # Annotations written after the checkpoint are written again
+            output.truncate(offset)
+            output.seek(offset)
+            games = (game for game in enumerate(gamelog.readlog(logpath)) if game[0] >= done)
+            start = last = time.perf_counter()
+            analysed = 0
+            for index, annotations in self.__analyze(games):
+                for annotation in annotations:
+                    output.write(json.dumps(annotation, separators=(',', ':')) + '\n')
+                analysed += 1
+                if time.perf_counter() - last > CHECKPOINTPERIOD:
+                    self.__checkpoint(checkpointpath, output, index + 1)
+                    last = time.perf_counter()
+                    if verbose:
+                        print('{} games analysed ({:.1f} games/s)'.format(index + 1, analysed / (last - start)))
+        if os.path.exists(checkpointpath):
+            os.remove(checkpointpath)
+        return analysed
+
+    def __checkpoint(self, path, output, games):
+        output.flush()
+        os.fsync(output.fileno())
+        with open(path + '.tmp', 'w') as file:
+            json.dump({'games': games, 'offset': output.tell()}, file)
+        os.replace(path + '.tmp', path)
+
+    def __analyze(self, games):
+        # Iterator on the (index, annotations) of the games, in order
+        if self.workers == 1:
+            engine = search.QuartoSearch(tablesize=self.tablesize)
+            for index, record in games:
+                yield index, analyzegame(engine, index, record, self.movetime, self.maxdepth)
+            return
+        with ProcessPoolExecutor(self.workers, initializer=_initworker, initargs=(self.tablesize,)) as executor:
+            window = self.workers * WINDOW
+            pending = {}
+            # Results done before those of the previous games
+            ready = {}
+            following = None
+            for index, record in games:
+                if following is None:
+                    following = index
+                pending[executor.submit(_analyzegame, index, record, self.movetime, self.maxdepth)] = index
+                while len(pending) + len(ready) >= window:
+                    following = yield from self.__collect(pending, ready, following)
+            while pending:
+                following = yield from self.__collect(pending, ready, following)
+
+    def __collect(self, pending, ready, following):
+        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            ready[pending.pop(future)] = future.result()
+        while following in ready:
+            yield following, ready.pop(following)
+            following += 1
+        return following
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# arena.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import importlib
+import json
+import random
+import time
+
+import bitboard
+import game
+import quarto
+
+# Transposition table of the search players, smaller than the one of the client
+# since many of them run at once
+TABLESIZE = 16 * 2**20
+
+
+class RandomPlayer:
+    '''Player choosing its moves at random, but announcing the Quartos it makes.'''
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def close(self):
+        pass
+
+    def nextmove(self, state):
+        return randommove(state, self.rng)
+
+
+def randommove(state, rng):
+    '''Random move in 'state' (a QuartoBitboard), as the object of its JSON encoding.'''
+    pos = None
+    remaining = state.remaining
+    quarto = False
+    if state.piece != bitboard.NOPIECE:
+        empty = state.empty
+        pos = rng.choice([square for square in range(16) if empty >> square & 1])
+        quarto = bool(state.completing(pos) >> state.piece & 1)
+        remaining &= ~(1 << state.piece)
+    pieces = [code for code in range(16) if remaining >> code & 1]
+    return state.tomove(pos, rng.choice(pieces) if pieces else None, quarto)
+
+
+def makeplayer(spec, seed=None):
+    '''Build a player from its description: 'random', 'search[:movetime]',
+    'mcts[:movetime]' or 'module.factory[:movetime]' (for instance
+    'main.QuartoPlayer:0.5'), the factory being called with the movetime if
+    there is one.'''
+    name, _, arg = spec.partition(':')
+    if name == 'random':
+        return RandomPlayer(seed)
+    if name == 'search':
+        return quarto.QuartoPlayer(float(arg) if arg else 0.1, TABLESIZE)
+    if name == 'mcts':
+        return quarto.QuartoPlayer(float(arg) if arg else 0.1, TABLESIZE, engine='mcts')
+    if '.' in name:
+        module, _, factory = name.rpartition('.')
+        factory = getattr(importlib.import_module(module), factory)
+        return factory(float(arg)) if arg else factory()
+    raise ValueError('Unknown player: {}'.format(spec))
+
+
+def playgame(players, first=0, rng=None, randomplies=0):
+    '''Play a game between two players, without any server.
+    Pre: 'players' are two objects with a nextmove(state) method taking a
+         QuartoBitboard and returning a move as the object of its JSON encoding.
+    Post: The returned value is a (winner, turns, forfeit) triple: the index of the
+          winner in 'players' (None for a draw), the number of moves played and
+          whether the game was lost by an invalid move. The first 'randomplies'
+          moves are chosen at random with 'rng'.
+    '''
+    state = quarto.QuartoState(currentPlayer=first)
+    winner = -1
+    turns = 0
+    while winner == -1:
+        player = state.currentplayer
+        board = bitboard.QuartoBitboard.frombytes(state.tobytes())
+        if turns < randomplies:
+            move = randommove(board, rng)
+        else:
+            move = players[player].nextmove(board)
+        try:
+            state.applymove(move)
+        except game.InvalidMoveException:
+            # Unlike the server, an invalid move loses the game
+            return 1 - player, turns, True
+        turns += 1
+        winner = state.winner()
+        state.nextPlayer()
+    return winner, turns, False
+
+
+def playseeded(specs, seed, index, randomplies=0):
+    '''Play the game number 'index' of a match between the players described by
+    'specs' (see makeplayer), the randomness depending only on 'seed' and 'index'.
+    Post: The returned value is a dict with the 'game' number, the 'first' player,
+          the 'winner', the number of 'turns' and whether it was lost by 'forfeit'.
+          The players take turns to move first as 'index' goes.
+    '''
+    rng = random.Random(seed * 2**32 + index)
+    players = [makeplayer(spec, rng.getrandbits(32)) for spec in specs]
+    first = index % 2
+    try:
+        winner, turns, forfeit = playgame(players, first, rng, randomplies)
+    finally:
+        for player in players:
+            player.close()
+    return {'game': index, 'first': first, 'winner': winner, 'turns': turns, 'forfeit': forfeit}
+
+
+def summarize(results):
+    '''Win/draw/loss statistics of the results of a match, for the first player.'''
+    stats = {'games': len(results), 'wins': 0, 'draws': 0, 'losses': 0, 'forfeits': 0, 'turns': 0}
+    # The same for the games where the first player moves first, or second
+    seats = [{'games': 0, 'wins': 0, 'draws': 0, 'losses': 0} for _ in range(2)]
+    for result in results:
+        key = 'draws' if result['winner'] is None else 'wins' if result['winner'] == 0 else 'losses'
+        stats[key] += 1
+        stats['forfeits'] += result['forfeit']
+        stats['turns'] += result['turns']
+        seat = seats[result['first']]
+        seat['games'] += 1
+        seat[key] += 1
+    games = max(1, len(results))
+    stats['score'] = (stats['wins'] + stats['draws'] / 2) / games
+    stats['turns'] /= games
+    stats['first'], stats['second'] = seats
+    return stats
+
+
+class Arena:
+    '''Match between two players, played in a process pool without any server.
+
+    Players are given as descriptions (see makeplayer) and built again for each
+    game, so that games do not depend on each other. The randomness of a game
+    (random players and opening moves) only depends on the seed and its number,
+    so that a match between players that do not depend on time can be replayed.
+    '''
+    def __init__(self, players, workers=None, seed=None, randomplies=0):
+        self.players = players
+        self.workers = workers
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.randomplies = randomplies
+
+    def run(self, games):
+        '''Play 'games' games and return their results, in order.'''
+        tasks = ([self.players] * games, [self.seed] * games, range(games), [self.randomplies] * games)
+        if self.workers == 1:
+            return list(map(playseeded, *tasks))
+        with ProcessPoolExecutor(self.workers) as executor:
+            return list(executor.map(playseeded, *tasks, chunksize=max(1, games // 64)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play Quarto games between two players without any server')
+    parser.add_argument('players', help="two players: 'random', 'search[:movetime]', 'mcts[:movetime]' or 'module.factory[:movetime]'", nargs=2)
+    parser.add_argument('--games', help='number of games (default: 100)', type=int, default=100)
+    parser.add_argument('--workers', help='number of processes (default: one per CPU)', type=int, default=None)
+    parser.add_argument('--seed', help='seed of the match', type=int, default=None)
+    parser.add_argument('--randomplies', help='number of random moves opening each game (default: 0)', type=int, default=0)
+    parser.add_argument('--json', help='print the statistics as JSON', action='store_true')
+    args = parser.parse_args()
+    arena = Arena(args.players, args.workers, args.seed, args.randomplies)
+    start = time.perf_counter()
+    stats = summarize(arena.run(args.games))
+    elapsed = time.perf_counter() - start
+    stats['seed'] = arena.seed
+    stats['seconds'] = elapsed
+    if args.json:
+        print(json.dumps(stats))
+    else:
+        print('{} vs {}: {} games in {:.1f} s (seed {})'.format(*args.players, stats['games'], elapsed, arena.seed))
+        print(' {wins} wins, {draws} draws, {losses} losses (score {score:.1%}), {forfeits} forfeits, {turns:.1f} moves per game'.format(**stats))
+        for seat in ('first', 'second'):
+            print(' Moving {}: {wins} wins, {draws} draws, {losses} losses'.format(seat, **stats[seat]))
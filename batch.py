@@ -0,0 +1,105 @@
+# batch.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import numpy as np
+
+import bitboard
+
+# Stands for the None returned by winner() for a draw
+DRAW = 2
+
+_LINES = np.array(bitboard.LINES, dtype=np.intp)
+# PATTERN of each piece code, the last item (index -1) being an empty square
+_PATTERN = np.array(bitboard.PATTERN + (255,), dtype=np.uint8)
+_COMPLETING = np.array(bitboard.COMPLETING, dtype=np.int32)
+# Lines through each square, padded with a line that never threatens anything
+_SQUARELINES = np.array([lines + (len(bitboard.LINES),) * (3 - len(lines)) for lines in bitboard.SQUARELINES], dtype=np.intp)
+_SQUAREBITS = np.int32(1) << np.arange(16, dtype=np.int32)
+
+
+def boards(states):
+    '''Build the (N, 16) array of boards and the (N,) arrays of remaining pieces
+    and pieces to play of a sequence of QuartoBitboard.'''
+    states = list(states)
+    return (
+        np.array([state.board for state in states], dtype=np.int8).reshape(-1, 16),
+        np.array([state.remaining for state in states], dtype=np.int32),
+        np.array([state.piece for state in states], dtype=np.int8),
+    )
+
+
+def _lines(boards):
+    # Number of pieces and pattern of each line, shapes (N, 10)
+    lines = np.asarray(boards, dtype=np.intp)[:, _LINES]
+    counts = (lines >= 0).sum(axis=2)
+    patterns = np.bitwise_and.reduce(_PATTERN[lines], axis=2)
+    return counts, patterns
+
+
+def _completing(boards, counts, patterns):
+    threats = np.where(counts == 3, _COMPLETING[patterns], 0)
+    threats = np.concatenate([threats, np.zeros((len(threats), 1), dtype=threats.dtype)], axis=1)
+    completing = np.bitwise_or.reduce(threats[:, _SQUARELINES], axis=2)
+    return np.where(np.asarray(boards) < 0, completing, 0)
+
+
+def winners(boards, players=0):
+    '''Winner of each board if the player to play announces a Quarto.
+    Pre: 'boards' is an (N, 16) array of piece codes, -1 for an empty square.
+    Post: The returned (N,) array contains, as QuartoBitboard.winner() with a Quarto
+          announced, -1 if the game is still going on, DRAW if it ended with a draw
+          or 'players' (the player to play, per board or for all of them) otherwise.
+    '''
+    counts, patterns = _lines(boards)
+    return _winners(boards, counts, patterns, players)
+
+
+def _winners(boards, counts, patterns, players):
+    quarto = ((counts == 4) & (patterns != 0)).any(axis=1)
+    full = (np.asarray(boards) >= 0).all(axis=1)
+    players = np.broadcast_to(np.asarray(players, dtype=np.int8), quarto.shape)
+    return np.where(quarto, players, np.where(full, np.int8(DRAW), np.int8(-1))).astype(np.int8)
+
+
+def completing(boards):
+    '''Pieces completing a Quarto on each square.
+    Pre: 'boards' is an (N, 16) array of piece codes, -1 for an empty square.
+    Post: The returned (N, 16) array contains, for each square, the mask of the piece
+          codes that would complete a Quarto if placed there (0 on occupied squares).
+    '''
+    counts, patterns = _lines(boards)
+    return _completing(boards, counts, patterns)
+
+
+def safepieces(boards, remaining):
+    '''Mask of the pieces of 'remaining' (an (N,) array of piece masks) that cannot
+    complete a Quarto, as given to the opponent after the placement in 'boards'.'''
+    return np.asarray(remaining, dtype=np.int32) & ~np.bitwise_or.reduce(completing(boards), axis=1)
+
+
+def winningsquares(boards, pieces):
+    '''Mask of the squares where the piece 'pieces' (an (N,) array of piece codes, -1
+    for none) completes a Quarto.'''
+    return _winningsquares(completing(boards), pieces)
+
+
+def _winningsquares(completing, pieces):
+    pieces = np.asarray(pieces, dtype=np.int32)
+    wins = completing >> np.maximum(pieces, 0)[:, None] & 1
+    return np.where(pieces >= 0, (wins * _SQUAREBITS).sum(axis=1), 0).astype(np.int32)
+
+
+def evaluate(boards, remaining, pieces, players=0):
+    '''Evaluate a batch of positions at once.
+    Pre: 'boards' is an (N, 16) array of piece codes (-1 for an empty square),
+         'remaining' an (N,) array of masks of the pieces not on the board and
+         'pieces' an (N,) array of pieces to play (-1 for none).
+    Post: The returned value is a (winners, safe, winning) triple of (N,) arrays:
+          the winner as given by winners(), the mask of the pieces of 'remaining'
+          that are safe to give and the mask of the squares where 'pieces' wins.
+    '''
+    counts, patterns = _lines(boards)
+    squares = _completing(boards, counts, patterns)
+    safe = np.asarray(remaining, dtype=np.int32) & ~np.bitwise_or.reduce(squares, axis=1)
+    return _winners(boards, counts, patterns, players), safe, _winningsquares(squares, pieces)
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# bench.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import argparse
+import copy
+import json
+import platform
+import random
+import sys
+import time
+
+import arena
+import bitboard
+import mcts
+import quarto
+import search
+
+# The corpus of positions is always the same
+CORPUS_SEED = 20181018
+CORPUS_SIZE = 200
+# Depth of the fixed depth searches, and number of positions searched
+SEARCHDEPTH = 3
+SEARCHPOSITIONS = 20
+SELFPLAYGAMES = 50
+# Playouts of each Monte Carlo tree search
+PLAYOUTS = 2000
+# Depth of the searches comparing the move orderings, and positions searched
+ORDERINGDEPTH = 5
+ORDERINGPOSITIONS = 30
+# A benchmark is a regression when it is that much slower than the baseline
+THRESHOLD = 0.1
+
+
+def corpus(size=CORPUS_SIZE, seed=CORPUS_SEED):
+    '''List of QuartoState reached by random games, with 1 to 15 pieces on the
+    board and a piece to play, the same for a given size and seed.'''
+    rng = random.Random(seed)
+    states = []
+    while len(states) < size:
+        state = quarto.QuartoState(currentPlayer=0)
+        target = rng.randrange(1, 16)
+        state.applymove({'nextPiece': rng.randrange(16)})
+        for placed in range(target):
+            board = bitboard.QuartoBitboard.frombytes(state.tobytes())
+            move = arena.randommove(board, rng)
+            if move.get('quarto') or 'nextPiece' not in move:
+                break
+            state.applymove(move)
+            state.nextPlayer()
+        else:
+            states.append(state)
+    return states
+
+
+def _withquarto(states):
+    # Copies of 'states' announcing a Quarto, so that winner() checks all the lines
+    states = copy.deepcopy(states)
+    for state in states:
+        state._state['visible']['quartoAnnounced'] = True
+    return states
+
+
+def bench_applymove(states):
+    moves = []
+    for state in states:
+        visible = state._state['visible']
+        pos = visible['board'].index(None)
+        moves.append({'pos': pos, 'nextPiece': 0} if len(visible['remainingPieces']) > 1 else {'pos': pos})
+
+    def run():
+        for state, move in zip(states, moves):
+            state.unmakemove(state.makemove(move))
+    return len(states), run
+
+
+def bench_winner(states):
+    states = _withquarto(states)
+
+    def run():
+        for state in states:
+            state.winner()
+    return len(states), run
+
+
+def bench_badpiece(states):
+    # Whether giving a remaining piece lets the opponent win, as the search checks it
+    boards = [bitboard.QuartoBitboard.frombytes(state.tobytes()) for state in states]
+    cases = [(board, code) for board in boards for code in range(16) if board.remaining >> code & 1]
+
+    def run():
+        for board, code in cases:
+            board.threats() >> code & 1
+    return len(cases), run
+
+
+def bench_tojson(states):
+    def run():
+        for state in states:
+            str(state)
+    return len(states), run
+
+
+def bench_parse(states):
+    messages = [str(state) for state in states]
+
+    def run():
+        for message in messages:
+            quarto.QuartoState.parse(message)
+    return len(messages), run
+
+
+def bench_tobytes(states):
+    def run():
+        for state in states:
+            state.tobytes()
+    return len(states), run
+
+
+def bench_bitboardparse(states):
+    messages = [state.tobytes() for state in states]
+
+    def run():
+        for message in messages:
+            bitboard.QuartoBitboard.frombytes(message)
+    return len(messages), run
+
+
+def bench_threats(states):
+    boards = [bitboard.QuartoBitboard.frombytes(state.tobytes()) for state in states]
+
+    def run():
+        for board in boards:
+            board.threats()
+    return len(boards), run
+
+
+def bench_selfplay(states):
+    def run():
+        for game in range(SELFPLAYGAMES):
+            rng = random.Random(game)
+            arena.playgame([arena.RandomPlayer(rng.getrandbits(32)), arena.RandomPlayer(rng.getrandbits(32))], game % 2, rng)
+    return SELFPLAYGAMES, run
+
+
+def bench_search(states):
+    # Nodes per second of fixed depth searches from the start, with a cleared table
+    boards = [bitboard.QuartoBitboard.frombytes(state.tobytes()) for state in states[:SEARCHPOSITIONS]]
+    player = search.QuartoSearch(tablesize=16 * 2**20)
+    counts = []
+
+    def run():
+        player.table.clear()
+        player.ordering.clear()
+        player.start(float('inf'))
+        for board in boards:
+            for move in player.rootmoves(board):
+                player.rootvalue(board, move, SEARCHDEPTH, -search.INFINITY, search.INFINITY)
+        counts.append(player.nodes)
+    run()
+    return counts[0], run
+
+
+def bench_mcts(states):
+    # Playouts per second of Monte Carlo tree searches with a fixed budget
+    boards = [bitboard.QuartoBitboard.frombytes(state.tobytes()) for state in states[:SEARCHPOSITIONS]]
+    counts = []
+
+    def run():
+        playouts = 0
+        for board in boards:
+            player = mcts.MonteCarloSearch(float('inf'), PLAYOUTS, seed=0)
+            player.bestmove(board)
+            playouts += player.nodes
+        counts.append(playouts)
+    run()
+    return counts[0], run
+
+
+BENCHMARKS = {
+    'applymove': bench_applymove,
+    'winner': bench_winner,
+    'badpiece': bench_badpiece,
+    'str': bench_tojson,
+    'parse': bench_parse,
+    'tobytes': bench_tobytes,
+    'frombytes': bench_bitboardparse,
+    'threats': bench_threats,
+    'selfplay': bench_selfplay,
+    'search': bench_search,
+    'mcts': bench_mcts,
+}
+
+
+def searchednodes(states, depth=ORDERINGDEPTH, ordering=True):
+    '''Number of nodes and time taken by iterative deepening searches of 'depth'
+    plies (at most) of each position of 'states', with the move ordering of
+    movegen (killers and history kept from iteration to iteration) or only
+    with the order of the squares and pieces.'''
+    nodes = 0
+    start = time.perf_counter()
+    for state in states:
+        board = bitboard.QuartoBitboard.frombytes(state.tobytes())
+        player = search.QuartoSearch(tablesize=16 * 2**20, ordering=ordering)
+        player.start(float('inf'))
+        if player.immediatemove(board) is not None:
+            continue
+        moves = player.rootmoves(board)
+        for iteration in range(1, min(depth, board.empty.bit_count()) + 1):
+            scores = {}
+            alpha = -search.INFINITY
+            for move in moves:
+                scores[move] = player.rootvalue(board, move, iteration, alpha, search.INFINITY)
+                alpha = max(alpha, scores[move])
+            moves.sort(key=lambda move: -scores[move])
+        nodes += player.nodes
+    return nodes, time.perf_counter() - start
+
+
+def runbenchmarks(names=None, repeat=5):
+    '''Run the benchmarks on the corpus.
+    Post: The returned value maps the name of each benchmark on its number of
+          operations per second (nodes for 'search', playouts for 'mcts', games
+          for 'selfplay'), the best of 'repeat' runs, and on the number of
+          operations of a run.
+    '''
+    states = corpus()
+    results = {}
+    for name in names or BENCHMARKS:
+        operations, run = BENCHMARKS[name](states)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        results[name] = {'rate': operations / best, 'operations': operations}
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    '''List of the (name, ratio, status) of the benchmarks in both 'results' and
+    'baseline', 'status' being 'regression', 'improvement' or 'ok'.'''
+    comparison = []
+    for name, result in results.items():
+        if name not in baseline['results']:
+            continue
+        ratio = result['rate'] / baseline['results'][name]['rate']
+        status = 'regression' if ratio < 1 - threshold else 'improvement' if ratio > 1 + threshold else 'ok'
+        comparison.append((name, ratio, status))
+    return comparison
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks of the Quarto state, move generation and search')
+    parser.add_argument('benchmarks', help='benchmarks to run (default: all of them)', nargs='*', choices=[[]] + list(BENCHMARKS))
+    parser.add_argument('--repeat', help='runs of each benchmark, the best one is kept (default: 5)', type=int, default=5)
+    parser.add_argument('--save', help='write the results as a baseline to this JSON file', default=None)
+    parser.add_argument('--compare', help='compare the results with this baseline JSON file', default=None)
+    parser.add_argument('--threshold', help='slowdown flagged as a regression (default: 0.1)', type=float, default=THRESHOLD)
+    parser.add_argument('--ordering', help='compare the nodes searched with and without move ordering, and exit', action='store_true')
+    args = parser.parse_args()
+    if args.ordering:
+        states = corpus(ORDERINGPOSITIONS)
+        plain, plaintime = searchednodes(states, ordering=False)
+        ordered, orderedtime = searchednodes(states)
+        print('Searches of {} plies of {} positions'.format(ORDERINGDEPTH, len(states)))
+        print(' Without ordering: {:10,} nodes in {:.2f} s'.format(plain, plaintime))
+        print(' With ordering:    {:10,} nodes in {:.2f} s'.format(ordered, orderedtime))
+        print(' Nodes: {:.1%} fewer, time: {:.2f}x'.format(1 - ordered / plain, plaintime / orderedtime))
+        sys.exit(0)
+    results = runbenchmarks(args.benchmarks, args.repeat)
+    for name, result in results.items():
+        print('{:12} {:14,.0f} /s  ({} per run)'.format(name, result['rate'], result['operations']))
+    if args.save is not None:
+        with open(args.save, 'w') as file:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': results}, file, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = 0
+        print()
+        for name, ratio, status in compare(results, baseline, args.threshold):
+            operations = baseline['results'][name]['operations']
+            note = '' if operations == results[name]['operations'] else ' (operations: {} before)'.format(operations)
+            print('{:12} {:6.2f}x {}{}'.format(name, ratio, status, note))
+            regressions += status == 'regression'
+        sys.exit(1 if regressions else 0)
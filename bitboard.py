@@ -0,0 +1,478 @@
+# bitboard.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import json
+import random
+import struct
+
+import game
+
+# A piece is encoded as a 4-bit integer, one bit per attribute. The bits are
+# chosen so that the code of a piece is also its index in the initial list of
+# remaining pieces built by quarto.QuartoState.
+ATTRIBUTES = (
+    ('shape', 'round', 'square', 3),
+    ('color', 'dark', 'light', 2),
+    ('height', 'low', 'high', 1),
+    ('filling', 'empty', 'full', 0),
+)
+ALLPIECES = 0xFFFF
+FULLBOARD = 0xFFFF
+NOPIECE = -1
+
+# 00 01 02 03
+# 04 05 06 07
+# 08 09 10 11
+# 12 13 14 15
+LINES = tuple(
+    [tuple(4 * i + e for e in range(4)) for i in range(4)] +
+    [tuple(4 * e + i for e in range(4)) for i in range(4)] +
+    [tuple(5 * e for e in range(4)), tuple(3 + 3 * e for e in range(4))]
+)
+LINEMASKS = tuple(sum(1 << s for s in line) for line in LINES)
+# Indices of the lines going through each square
+SQUARELINES = tuple(tuple(l for l, line in enumerate(LINES) if pos in line) for pos in range(16))
+OTHERLINES = tuple(tuple(l for l, line in enumerate(LINES) if pos not in line) for pos in range(16))
+
+# The pattern of a line has the attribute bits shared by all its pieces set in
+# its low nibble and those missing from all its pieces set in its high nibble,
+# so it is the AND of the PATTERN of its pieces (255 for an empty line). A full
+# line is a Quarto if its pattern is not 0.
+PATTERN = tuple(code | (~code & 15) << 4 for code in range(16))
+
+# COMPLETING[pattern] is the mask of the pieces that complete a Quarto on a line
+# of three pieces with that pattern.
+COMPLETING = tuple(
+    sum(1 << code for code in range(16) if code & (index & 15) or ~code & (index >> 4))
+    for index in range(256)
+)
+
+def lowest(mask):
+    '''Index of the lowest bit set in a non-empty mask.'''
+    return (mask & -mask).bit_length() - 1
+
+
+# Zobrist keys: a random 64-bit number per piece on each square and per piece to
+# play (none for NOPIECE, the last item)
+_random = random.Random(20180329)
+ZOBRIST = tuple(tuple(_random.getrandbits(64) for piece in range(16)) for pos in range(16))
+ZOBRISTPIECE = tuple(_random.getrandbits(64) for piece in range(16)) + (0,)
+
+# Binary wire encoding of a state (see game.BinaryCodec.tobytes): the piece codes
+# of the board as nibbles (square 0 in the lowest one), the masks of the
+# occupied squares and of the remaining pieces (with the piece to play), the
+# code of the piece to play (NOPIECE for none) and flags (bit 0: Quarto
+# announced, bit 1: current player)
+STATEFORMAT = struct.Struct('<QHHbB')
+# Binary wire encoding of a move: the square (bit 7 set if a Quarto is
+# announced, NOMOVE for none) and the index of the next piece (NOMOVE for none)
+MOVEFORMAT = struct.Struct('<BB')
+NOMOVE = 127
+
+
+def packstate(board, remaining, piece, quarto, player):
+    '''Binary encoding of a state given as a list of 16 piece codes, a mask of
+    remaining pieces, the code of the piece to play, the Quarto flag and the
+    current player.'''
+    nibbles = 0
+    occupied = 0
+    for pos, code in enumerate(board):
+        if code != NOPIECE:
+            nibbles |= code << 4 * pos
+            occupied |= 1 << pos
+    return STATEFORMAT.pack(nibbles, occupied, remaining, piece, quarto | player << 1)
+
+
+def unpackstate(data):
+    '''Inverse of packstate: the (board, remaining, piece, quarto, player) tuple.
+    Raises ValueError: If 'data' is not a packed state.
+    '''
+    try:
+        nibbles, occupied, remaining, piece, flags = STATEFORMAT.unpack(data)
+    except struct.error:
+        raise ValueError('A binary state must be {} bytes long'.format(STATEFORMAT.size))
+    board = [nibbles >> 4 * pos & 15 if occupied >> pos & 1 else NOPIECE for pos in range(16)]
+    return board, remaining, piece, bool(flags & 1), flags >> 1 & 1
+
+
+def packmove(move):
+    '''Binary encoding of a JSON move.'''
+    pos = move.get('pos')
+    nextPiece = move.get('nextPiece')
+    return MOVEFORMAT.pack(
+        (NOMOVE if pos is None else pos) | (128 if move.get('quarto') else 0),
+        NOMOVE if nextPiece is None else nextPiece
+    )
+
+
+def unpackmove(data):
+    '''Inverse of packmove.
+    Raises InvalidMoveException: If 'data' is not a packed move.
+    '''
+    if len(data) != MOVEFORMAT.size:
+        raise game.InvalidMoveException('A binary move must be {} bytes long'.format(MOVEFORMAT.size))
+    pos, nextPiece = MOVEFORMAT.unpack(data)
+    move = {}
+    if pos & 127 != NOMOVE:
+        move['pos'] = pos & 127
+    if nextPiece != NOMOVE:
+        move['nextPiece'] = nextPiece
+    if pos & 128:
+        move['quarto'] = True
+    return move
+
+
+def encodepiece(piece):
+    '''Convert a piece of the JSON state (a dict of four attributes) into its code.'''
+    try:
+        return _ENCODED[piece['shape'], piece['color'], piece['height'], piece['filling']]
+    except KeyError:
+        pass
+    code = 0
+    for name, off, on, bit in ATTRIBUTES:
+        if piece[name] == on:
+            code |= 1 << bit
+        elif piece[name] != off:
+            raise ValueError('Unknown {} for a piece: {}'.format(name, piece[name]))
+    return code
+
+
+def decodepiece(code):
+    '''Convert the code of a piece into the dict used by the JSON state.'''
+    return dict(_DECODED[code])
+
+
+_DECODED = tuple({name: on if code >> bit & 1 else off for name, off, on, bit in ATTRIBUTES} for code in range(16))
+_ENCODED = {tuple(piece[name] for name, _, _, _ in ATTRIBUTES): code for code, piece in enumerate(_DECODED)}
+
+
+def displaypiece(code):
+    if code == NOPIECE:
+        return " " * 6
+    bracket = ('[', ']') if code & 8 else ('(', ')')
+    filling = 'F' if code & 1 else 'E'
+    color = 'L' if code & 4 else 'D'
+    format = '{0}{0}{1}{2}{3}{3}' if code & 2 else ' {}{}{}{} '
+    return format.format(bracket[0], filling, color, bracket[1])
+
+
+class QuartoBitboard(game.GameState, game.BinaryCodec):
+    '''Compact state for the Quarto game.
+
+    The board is kept as an occupancy mask and, for each line, the number of
+    pieces and the pattern of their attributes (see PATTERN), both updated on
+    each move. The remaining pieces are kept as a mask of piece codes. It reads
+    and writes the same 'visible' JSON state as quarto.QuartoState.
+    '''
+    def __init__(self, initialstate=None, currentPlayer=None):
+        if currentPlayer is None:
+            currentPlayer = random.randrange(2)
+        self._player = currentPlayer
+        self._board = [NOPIECE] * 16
+        self._occupied = 0
+        self._counts = [0] * len(LINES)
+        self._patterns = [255] * len(LINES)
+        self._quartos = 0
+        self._remaining = ALLPIECES
+        self._piece = NOPIECE
+        self._quarto = False
+        self._hash = 0
+        if initialstate is not None:
+            self._load(initialstate)
+
+    def _load(self, visible):
+        remaining = [encodepiece(piece) for piece in visible['remainingPieces']]
+        for pos, piece in enumerate(visible['board']):
+            if piece is not None:
+                self._place(pos, encodepiece(piece))
+        self._remaining = sum(1 << code for code in remaining)
+        if visible['pieceToPlay'] is not None:
+            self._piece = remaining[visible['pieceToPlay']]
+        self._quarto = visible['quartoAnnounced']
+
+    @property
+    def visible(self):
+        '''The state in the JSON format used by quarto.QuartoState.'''
+        return {
+            'board': [None if code == NOPIECE else decodepiece(code) for code in self._board],
+            'remainingPieces': [decodepiece(code) for code in range(16) if self._remaining >> code & 1],
+            'pieceToPlay': None if self._piece == NOPIECE else self.pieceindex(self._piece),
+            'quartoAnnounced': self._quarto
+        }
+
+    def __str__(self):
+        return json.dumps({'visible': self.visible, 'currentPlayer': self._player}, separators=(',', ':'))
+
+    def tobytes(self):
+        return packstate(self._board, self._remaining, self._piece, self._quarto, self._player)
+
+    @classmethod
+    def frombytes(cls, data):
+        board, remaining, piece, quarto, player = unpackstate(data)
+        state = cls(currentPlayer=player)
+        for pos, code in enumerate(board):
+            if code != NOPIECE:
+                state._place(pos, code)
+        state._remaining = remaining
+        state._piece = piece
+        state._quarto = quarto
+        return state
+
+    @classmethod
+    def movetobytes(cls, move):
+        return packmove(move)
+
+    @classmethod
+    def movefrombytes(cls, data):
+        return unpackmove(data)
+
+    def __repr__(self):
+        return json.dumps({'visible': self.visible, 'hidden': None, 'currentPlayer': self._player}, separators=(',', ':'))
+
+    @property
+    def currentplayer(self):
+        return self._player
+
+    @property
+    def board(self):
+        return self._board
+
+    @property
+    def remaining(self):
+        return self._remaining
+
+    @property
+    def piece(self):
+        return self._piece
+
+    @property
+    def empty(self):
+        return ~self._occupied & FULLBOARD
+
+    @property
+    def zobrist(self):
+        '''Zobrist hash of the board and the piece to play, updated on each move.'''
+        return self._hash ^ ZOBRISTPIECE[self._piece]
+
+    def pieceindex(self, code):
+        '''Index of the piece 'code' in the list of remaining pieces of the JSON state.'''
+        return (self._remaining & ((1 << code) - 1)).bit_count()
+
+    def piececode(self, index):
+        '''Code of the piece at position 'index' in the list of remaining pieces.'''
+        remaining = self._remaining
+        for _ in range(index):
+            remaining &= remaining - 1
+        return lowest(remaining)
+
+    def _place(self, pos, piece):
+        self._board[pos] = piece
+        self._occupied |= 1 << pos
+        self._hash ^= ZOBRIST[pos][piece]
+        self._remaining &= ~(1 << piece)
+        counts = self._counts
+        patterns = self._patterns
+        pattern = PATTERN[piece]
+        for l in SQUARELINES[pos]:
+            counts[l] += 1
+            patterns[l] &= pattern
+            if counts[l] == 4 and patterns[l]:
+                self._quartos += 1
+
+    def _remove(self, pos):
+        board = self._board
+        piece = board[pos]
+        board[pos] = NOPIECE
+        self._occupied &= ~(1 << pos)
+        self._hash ^= ZOBRIST[pos][piece]
+        self._remaining |= 1 << piece
+        counts = self._counts
+        patterns = self._patterns
+        for l in SQUARELINES[pos]:
+            if counts[l] == 4 and patterns[l]:
+                self._quartos -= 1
+            counts[l] -= 1
+            # An AND cannot be undone: compute it again from the other pieces
+            pattern = 255
+            for s in LINES[l]:
+                if board[s] != NOPIECE:
+                    pattern &= PATTERN[board[s]]
+            patterns[l] = pattern
+
+    def applymove(self, move):
+        #{pos: 8, quarto: true, nextPiece: 2}
+        self.makemove(move)
+
+    def makemove(self, move):
+        '''Apply a move in place, without copying the state.
+        Pre: -
+        Post: The specified 'move' has been applied and the returned token can be
+              given to unmakemove to undo it. The state is unchanged if 'move' is invalid.
+        Raises InvalidMoveException: If 'move' is invalid.
+        '''
+        if not isinstance(move, dict):
+            raise game.InvalidMoveException('A valid move must be a JSON object')
+        pos = None
+        count = self._remaining.bit_count()
+        if self._piece != NOPIECE:
+            pos = move.get('pos')
+            if not isinstance(pos, int) or not 0 <= pos < 16:
+                raise game.InvalidMoveException("Your move should contain a \"pos\" key in range(16)")
+            if self._board[pos] != NOPIECE:
+                raise game.InvalidMoveException('The position is not free')
+            count -= 1
+
+        index = None
+        if count > 0:
+            if 'nextPiece' not in move:
+                raise game.InvalidMoveException("You must specify the next piece to play")
+            index = move['nextPiece']
+            if not isinstance(index, int) or not 0 <= index < count:
+                raise game.InvalidMoveException("Your move should contain a \"nextPiece\" key in range({})".format(count))
+
+        token = (pos, self._piece, self._quarto)
+        if pos is not None:
+            self._place(pos, self._piece)
+        self._piece = NOPIECE if index is None else self.piececode(index)
+
+        if 'quarto' in move:
+            self._quarto = move['quarto']
+            winner = self.winner()
+            if winner is None or winner == -1:
+                self.unmakemove(token)
+                raise game.InvalidMoveException("There is no Quarto !")
+        else:
+            self._quarto = False
+        return token
+
+    def unmakemove(self, token):
+        '''Undo a move applied with makemove.
+        Pre: 'token' was returned by the last makemove not undone yet.
+        Post: The state is the same as before that move.
+        '''
+        pos, self._piece, self._quarto = token
+        if pos is not None:
+            self._remove(pos)
+
+    def copy(self):
+        '''Copy of this state, sharing nothing with it.'''
+        state = QuartoBitboard.__new__(QuartoBitboard)
+        state.__dict__.update(self.__dict__)
+        state._board = list(self._board)
+        state._counts = list(self._counts)
+        state._patterns = list(self._patterns)
+        return state
+
+    def place(self, pos):
+        '''Place the piece to play on 'pos', without any check (used by the search).'''
+        self._place(pos, self._piece)
+        self._piece = NOPIECE
+
+    def unplace(self, pos):
+        '''Undo place(pos): the piece on 'pos' becomes the piece to play again.'''
+        self._piece = self._board[pos]
+        self._remove(pos)
+
+    def give(self, piece):
+        '''Set the piece to play, without any check (used by the search).'''
+        self._piece = piece
+
+    def tomove(self, pos, piece, quarto=False):
+        '''Build the JSON move placing the piece to play on 'pos' and giving 'piece'.'''
+        move = {}
+        remaining = self._remaining
+        if pos is not None:
+            move['pos'] = pos
+            remaining &= ~(1 << self._piece)
+        if piece is not None:
+            move['nextPiece'] = (remaining & ((1 << piece) - 1)).bit_count()
+        if quarto:
+            move['quarto'] = True
+        return move
+
+    def completing(self, pos):
+        '''Mask of the piece codes that would complete a Quarto if placed on 'pos'.'''
+        pieces = 0
+        counts = self._counts
+        for l in SQUARELINES[pos]:
+            if counts[l] == 3:
+                pieces |= COMPLETING[self._patterns[l]]
+        return pieces
+
+    def lines(self):
+        '''Copies of the number of pieces and of the pattern (see PATTERN) of each line.'''
+        return list(self._counts), list(self._patterns)
+
+    def threats(self):
+        '''Mask of the piece codes that would complete a Quarto if placed now.'''
+        pieces = 0
+        counts = self._counts
+        for l in range(len(LINES)):
+            if counts[l] == 3:
+                pieces |= COMPLETING[self._patterns[l]]
+        return pieces
+
+    def threatsafter(self, pos):
+        '''Mask of the piece codes that would complete a Quarto once the piece to play
+        is placed on 'pos', as threats() would give then, without placing it.'''
+        pieces = 0
+        counts = self._counts
+        patterns = self._patterns
+        pattern = PATTERN[self._piece]
+        for l in SQUARELINES[pos]:
+            if counts[l] == 2:
+                pieces |= COMPLETING[patterns[l] & pattern]
+        for l in OTHERLINES[pos]:
+            if counts[l] == 3:
+                pieces |= COMPLETING[patterns[l]]
+        return pieces
+
+    def threatening(self):
+        '''Mask of the empty squares where placing the piece to play would leave a line
+        of three pieces sharing an attribute.'''
+        squares = 0
+        counts = self._counts
+        patterns = self._patterns
+        pattern = PATTERN[self._piece]
+        for l in range(len(LINES)):
+            if counts[l] == 2 and patterns[l] & pattern:
+                squares |= LINEMASKS[l]
+        return squares & ~self._occupied
+
+    def winningsquare(self, piece):
+        '''Square where 'piece' completes a Quarto, or -1 if there is none.'''
+        counts = self._counts
+        for l in range(len(LINES)):
+            if counts[l] == 3 and COMPLETING[self._patterns[l]] >> piece & 1:
+                return (LINEMASKS[l] & ~self._occupied).bit_length() - 1
+        return -1
+
+    def hasquarto(self):
+        '''Check whether four pieces sharing an attribute are aligned somewhere on the board.'''
+        return self._quartos > 0
+
+    def winner(self):
+        if self._quarto and self.hasquarto():
+            return self._player
+        return None if self._occupied == FULLBOARD else -1
+
+    def prettyprint(self):
+        print('Board:')
+        for row in range(4):
+            print('|', end="")
+            for col in range(4):
+                print(displaypiece(self._board[row*4+col]), end="|")
+            print()
+
+        print('\nRemaining Pieces:')
+        print(", ".join([displaypiece(code) for code in range(16) if self._remaining >> code & 1]))
+
+        if self._piece != NOPIECE:
+            print('\nPiece to Play:')
+            print ('\n nbrofremaining : ', self._remaining.bit_count())
+            print ('\n index : ', self.pieceindex(self._piece))
+            print(displaypiece(self._piece))
+
+    def nextPlayer(self):
+        self._player = (self._player + 1) % 2
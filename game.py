@@ -3,20 +3,133 @@
 # Version: April 20, 2016
 
 from abc import *
+import asyncio
 import copy
 import json
 import socket
+import struct
 import sys
+import time
+import traceback
 
+import metrics
+
+# Size of the chunks read from a socket, messages can be longer
 DEFAULT_BUFFER_SIZE = 2048
+# Pending connections of a lobby, many players may connect at once for a tournament
+LOBBY_BACKLOG = 1024
 SECTION_WIDTH = 60
 
 
+# Messages are framed as a 4-byte big-endian length followed by the payload,
+# UTF-8 text or binary states and moves (see GameState.encodings)
+FRAME_HEADER = struct.Struct('>I')
+# Longer frames are refused: the peer is not speaking the protocol
+MAX_MESSAGE_SIZE = 2**24
+# Time a player may take beyond its budget, for the network, in seconds
+TIME_MARGIN = 0.1
+
+
+def _milliseconds(seconds):
+    # Time budget of the protocol, -1 standing for no limit
+    return -1 if seconds is None else max(0, int(seconds * 1000))
+
+
+def _seconds(milliseconds):
+    milliseconds = int(milliseconds)
+    return None if milliseconds < 0 else milliseconds / 1000
+
+
 def _printsection(title):
     print()
     print(' {} '.format(title).center(SECTION_WIDTH, '='))
 
 
+class FramingError(ConnectionError):
+    '''Exception raised when a peer sends data that is not a valid message frame.'''
+    pass
+
+
+def frame(message):
+    '''Bytes to send for 'message', a string or bytes.'''
+    data = message.encode() if isinstance(message, str) else message
+    return FRAME_HEADER.pack(len(data)) + data
+
+
+def _framesize(header):
+    size = FRAME_HEADER.unpack(header)[0]
+    if size > MAX_MESSAGE_SIZE:
+        raise FramingError('Message of {} bytes is too long'.format(size))
+    return size
+
+
+def sendmessage(sock, message):
+    '''Send 'message', a string or bytes, in a frame on the socket 'sock'.'''
+    sock.sendall(frame(message))
+
+
+class MessageReader:
+    '''Buffered reader splitting the bytes received on a socket into messages.
+
+    Bytes following a message in a chunk are kept for the next read, so that
+    messages merged or split by TCP are read whole and in order.
+    '''
+    def __init__(self, sock, chunksize=DEFAULT_BUFFER_SIZE):
+        self.__socket = sock
+        self.__chunksize = chunksize
+        self.__buffer = bytearray()
+
+    def read(self):
+        '''Read the next message.
+        Pre: -
+        Post: The returned value is the next message received as a string, or None
+              if the connection was closed.
+        Raises FramingError: If the peer does not send valid frames.
+        '''
+        message = self.readframe()
+        return None if message is None else message.decode(errors='replace')
+
+    def readframe(self):
+        '''Read the next message as bytes (see read).'''
+        buffer = self.__buffer
+        while True:
+            if len(buffer) >= FRAME_HEADER.size:
+                end = FRAME_HEADER.size + _framesize(buffer[:FRAME_HEADER.size])
+                if len(buffer) >= end:
+                    message = bytes(buffer[FRAME_HEADER.size:end])
+                    del buffer[:end]
+                    return message
+                chunksize = max(self.__chunksize, end - len(buffer))
+            else:
+                chunksize = self.__chunksize
+            data = self.__socket.recv(chunksize)
+            if not data:
+                if buffer:
+                    raise FramingError('Connection closed in the middle of a message')
+                return None
+            buffer += data
+
+
+async def readmessage(reader):
+    '''Read the next message from the asyncio stream 'reader' (see MessageReader.read).'''
+    message = await readframe(reader)
+    return None if message is None else message.decode(errors='replace')
+
+
+async def readframe(reader):
+    '''Read the next message from the asyncio stream 'reader' as bytes.'''
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise FramingError('Connection closed in the middle of a message')
+        return None
+    try:
+        return await reader.readexactly(_framesize(header))
+    except asyncio.IncompleteReadError:
+        raise FramingError('Connection closed in the middle of a message')
+
+
 class InvalidMoveException(Exception):
     '''Exception representing an invalid move.'''
     def __init__(self, message):
@@ -73,14 +186,82 @@ class GameState(metaclass=ABCMeta):
     def buffersize(cls):
         return DEFAULT_BUFFER_SIZE
 
+    @classmethod
+    def encodings(cls):
+        '''Wire encodings supported for the states and the moves: 'json' (str() and
+        parse()) and 'binary' for the classes that are also a BinaryCodec.'''
+        return ('json', 'binary') if issubclass(cls, BinaryCodec) else ('json',)
+
+
+class BinaryCodec(metaclass=ABCMeta):
+    '''Abstract mixin of the game states that have a binary wire encoding.'''
+    @abstractmethod
+    def tobytes(self):
+        '''Binary encoding of the state sent to the players.'''
+        ...
+
+    @classmethod
+    @abstractmethod
+    def frombytes(cls, data):
+        '''State decoded from its binary encoding.'''
+        ...
+
+    @classmethod
+    @abstractmethod
+    def movetobytes(cls, move):
+        '''Binary encoding of a move, given as the object of its JSON encoding.'''
+        ...
+
+    @classmethod
+    @abstractmethod
+    def movefrombytes(cls, data):
+        '''Move decoded from its binary encoding, as the object of its JSON encoding.
+        Raises InvalidMoveException: If 'data' is not a valid binary move.
+        '''
+        ...
+
+
+# Measures of the components given no metrics
+_NOMETRICS = metrics.Metrics()
+
 
 class GameServer(metaclass=ABCMeta):
-    '''Abstract class representing a generic game server.'''
-    def __init__(self, name, nbplayers, initialstate, verbose=False):
+    '''Abstract class representing a generic game server.
+
+    A game server plays one game between its players, each one being a
+    (reader, writer) pair of asyncio streams. The run() method accepts the
+    players of a single game, and GameLobby runs many games at once.
+
+    A player may ask for the binary encoding of the states and moves with an
+    'encoding=binary' word in its READY message. If the state class supports
+    it, the server answers 'ENCODING binary' before the first PLAY, otherwise
+    the game goes on in JSON.
+
+    Each move must be received within 'movetime' seconds, and all the moves of
+    a player within 'gametime' seconds (None for no limit), or the player loses
+    the game. A player asking for it with a 'clock=1' word in its READY message
+    gets 'CLOCK <movetime> <gametime>' before the first PLAY, and then its PLAY
+    messages start with the time it has for the move and its time left for the
+    game ('PLAY <movetime> <gametime> <state>'), in milliseconds (-1 for no limit).
+
+    The time taken to encode each state, to wait for each move and to apply it
+    is recorded in 'metrics' (see metrics.Metrics), and each game played to
+    the end is written to 'recorder' (see gamelog.GameRecorder), with its moves
+    in the binary encoding when the state class supports it.
+    '''
+    def __init__(self, name, nbplayers, initialstate, verbose=False, movetime=None, gametime=None, metrics=None, recorder=None):
         self.__name = name
         self.__nbplayers = nbplayers
         self.__verbose = verbose
         self._state = initialstate
+        self.movetime = movetime
+        self.gametime = gametime
+        self.__metrics = (metrics or _NOMETRICS).game()
+        self.__recorder = recorder
+        self.__players = []
+        self.__binary = []
+        self.__clocked = []
+        self.__timeleft = []
         # Stats about the running game
         self.__turns = 0
 
@@ -104,7 +285,12 @@ class GameServer(metaclass=ABCMeta):
     def applymove(self, move):
         '''Apply a move.
         Pre: 'move' is valid
+              'move' is the string sent by the player, or the object of its JSON
+              encoding if the player uses the binary encoding.
         Post: The specified 'move' have been applied to the game for the current player.
+              For the state classes with a binary encoding, the returned value is
+              the move as applied, as the object of its JSON encoding without the
+              fields the game ignored (it is what gets recorded).
         Raises InvalidMoveException: If 'move' is invalid.
         '''
         ...
@@ -113,78 +299,147 @@ class GameServer(metaclass=ABCMeta):
     def state(self):
         return copy.deepcopy(self._state)
 
-    def _waitplayers(self):
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        s.bind(('0.0.0.0', 5000))
-        s.listen(self.nbplayers)
+    async def _send(self, player, message):
+        writer = player[1]
+        writer.write(frame(message))
+        await writer.drain()
+
+    async def _recv(self, player):
+        message = await readframe(player[0])
+        if message is None:
+            raise ConnectionResetError('Connection closed by the player')
+        return message
+
+    async def _waitplayers(self, host, port):
+        # Accept the players of one game, and then stop listening
+        players = []
+        full = asyncio.Event()
+
+        async def accept(reader, writer):
+            if len(players) == self.nbplayers:
+                writer.close()
+                return
+            players.append((reader, writer))
+            if self.__verbose:
+                print(' - Client connected from {}:{} ({}/{}).'
+                      .format(*writer.get_extra_info('peername')[:2], len(players), self.nbplayers)
+                      )
+            if len(players) == self.nbplayers:
+                full.set()
+
+        listener = await asyncio.start_server(accept, host, port, reuse_address=True)
         if self.__verbose:
             _printsection('Starting {}'.format(self.name))
-            try:
-                print(' Game server listening on {}:{}.'.format(socket.gethostbyname(socket.gethostname()), 5000))
-            except:
-                print(' Game server listening on port {}.'.format(5000))
+            print(' Game server listening on {}:{}.'.format(host, port))
             print(' Waiting for {} players...'.format(self.nbplayers))
-        self.__players = []
-        # Wait for enough players for a play
         try:
-            while len(self.__players) < self.__nbplayers:
-                client = s.accept()[0]
-                self.__players.append(client)
-                if self.__verbose:
-                    print(' - Client connected from {}:{} ({}/{}).'
-                          .format(*client.getpeername(), len(self.__players), self.nbplayers)
-                          )
-        except KeyboardInterrupt:
-            for player in self.__players:
-                player.close()
-            _printsection('Game server ended')
-            return False
+            await full.wait()
+        finally:
+            listener.close()
+        return players
+
+    async def _initplayers(self):
         # Notify players that the game started
-        try:
-            for i in range(len(self.__players)):
+        self.__binary = [False] * len(self.__players)
+        self.__clocked = [False] * len(self.__players)
+        self.__timeleft = [self.gametime] * len(self.__players)
+        for i, player in enumerate(self.__players):
+            if self.__verbose:
+                print(' Initialising player {}...'.format(i))
+            await self._send(player, 'START {}'.format(i))
+            data = (await self._recv(player)).decode(errors='replace').split(' ')
+            if data[0] != 'READY':
                 if self.__verbose:
-                    print(' Initialising player {}...'.format(i))
-                player = self.__players[i]
-                player.sendall('START {}'.format(i).encode())
-                data = player.recv(self._state.__class__.buffersize()).decode().split(' ')
-                if data[0] != 'READY':
-                    if self.__verbose:
-                        print(' - Player {} not ready to start.'.format(i))
-                        _printsection('Current game ended')
-                    return False
-                elif self.__verbose:
-                    print(' - Player {} ({}) ready to start.'.format(i, data[1] if len(data) == 2 else 'Anonymous'))
-        except OSError:
+                    print(' - Player {} not ready to start.'.format(i))
+                    _printsection('Current game ended')
+                return False
+            name = ' '.join(word for word in data[1:] if '=' not in word)
+            if 'encoding=binary' in data[1:] and 'binary' in self._state.__class__.encodings():
+                self.__binary[i] = True
+                await self._send(player, 'ENCODING binary')
+            if 'clock=1' in data[1:]:
+                self.__clocked[i] = True
+                await self._send(player, 'CLOCK {} {}'.format(_milliseconds(self.movetime), _milliseconds(self.gametime)))
             if self.__verbose:
-                print('Error while notifying player {}.'.format(player))
-            return False
+                print(' - Player {} ({}) ready to start{}.'.format(
+                    i, name or 'Anonymous', ' (binary encoding)' if self.__binary[i] else ''
+                ))
         # Start the game since all the players are ready
         if self.__verbose:
             _printsection('Game initialised (all players ready to start)')
         return True
 
-    def _gameloop(self):
+    async def _gameloop(self):
         winner = -1
         if self.__verbose:
             print(' Initial state:')
             self._state.prettyprint()
+        loop = asyncio.get_running_loop()
+        # Record of the game: its moves (None when invalid) and their times
+        first = self.currentplayer
+        started = time.time()
+        recordbinary = 'binary' in self._state.__class__.encodings()
+        moves = []
+        times = []
+        timeout = False
         # Loop until the game ends with a winner or with a draw
         while winner == -1:
-            player = self.__players[self.currentplayer]
+            current = self.currentplayer
+            player = self.__players[current]
+            binary = self.__binary[current]
             if self.__verbose:
-                print("\n=> Turn #{} (player {})".format(self.turns, self.currentplayer))
-            player.sendall('PLAY {}'.format(self.state).encode())
+                print("\n=> Turn #{} (player {})".format(self.turns, current))
+            budget = self.__timeleft[current]
+            if self.movetime is not None and (budget is None or self.movetime < budget):
+                budget = self.movetime
+            clock = ''
+            if self.__clocked[current]:
+                clock = '{} {} '.format(_milliseconds(budget), _milliseconds(self.__timeleft[current]))
+            encodestart = time.perf_counter()
+            if binary:
+                message = 'PLAY {}'.format(clock).encode() + self._state.tobytes()
+            else:
+                message = 'PLAY {}{}'.format(clock, self._state)
+            encode = time.perf_counter() - encodestart
+            await self._send(player, message)
+            start = loop.time()
+            try:
+                data = await asyncio.wait_for(self._recv(player), None if budget is None else budget + TIME_MARGIN)
+            except asyncio.TimeoutError:
+                data = None
+            elapsed = loop.time() - start
+            if self.__timeleft[current] is not None:
+                self.__timeleft[current] -= elapsed
+            if data is None or budget is not None and elapsed > budget + TIME_MARGIN:
+                # The player ran out of time: the next one wins
+                if self.__verbose:
+                    print('Time is over for player {} ({:.3f} s).'.format(current, elapsed))
+                await self._send(player, 'ERROR Time is over')
+                self.__metrics.turn(player=current, encode=encode, wait=elapsed, timeout=True)
+                moves.append(None)
+                times.append(elapsed)
+                timeout = True
+                winner = (current + 1) % self.nbplayers
+                break
+            applystart = time.perf_counter()
             try:
-                move = player.recv(self._state.__class__.buffersize()).decode()
+                if binary:
+                    move = self._state.__class__.movefrombytes(data)
+                else:
+                    move = data.decode(errors='replace')
                 if self.__verbose:
                     print('   Move:', move)
-                self.applymove(move)
+                applied = self.applymove(move)
                 self.__turns += 1
+                if self.__recorder is not None:
+                    moves.append(self._state.__class__.movetobytes(applied) if recordbinary else data)
             except InvalidMoveException as e:
                 if self.__verbose:
                     print('Invalid move:', e)
-                player.sendall('ERROR {}'.format(e).encode())
+                await self._send(player, 'ERROR {}'.format(e))
+                moves.append(None)
+            times.append(elapsed)
+            self.__metrics.turn(player=current, encode=encode, wait=elapsed, apply=time.perf_counter() - applystart)
             if self.__verbose:
                 print('   State:')
                 self._state.prettyprint()
@@ -195,80 +450,363 @@ class GameServer(metaclass=ABCMeta):
         # Notify players about won/lost status
         if winner is not None:
             for i in range(self.nbplayers):
-                self.__players[i].sendall(('WON' if winner == i else 'LOST').encode())
+                await self._send(self.__players[i], 'WON' if winner == i else 'LOST')
             if self.__verbose:
                 print(' The winner is player {}.'.format(winner))
         # Notify players that the game ended
         else:
             for player in self.__players:
-                player.sendall('END'.encode())
-        # Close the connexions with the clients
-        for player in self.__players:
-            player.close()
+                await self._send(player, 'END')
         if self.__verbose:
             _printsection('Game ended')
+        self.__metrics.end(winner=winner)
+        if self.__recorder is not None:
+            self.__recorder.record(started, first, winner, moves, times, timeout, jsonmoves=not recordbinary)
+        return winner
+
+    async def play(self, players):
+        '''Play a game.
+        Pre: 'players' is a list of 'nbplayers' (reader, writer) pairs of asyncio streams.
+        Post: The returned value is the winner as given by GameState.winner(), or -1 if
+              the game could not be played to the end. The connections are closed.
+        Raises OSError: If the connection with a player is lost.
+        '''
+        self.__players = players
+        try:
+            if not await self._initplayers():
+                return -1
+            return await self._gameloop()
+        finally:
+            # Close the connexions with the clients
+            for _, writer in players:
+                writer.close()
+
+    async def _runonce(self, host, port):
+        players = await self._waitplayers(host, port)
+        try:
+            await self.play(players)
+        except OSError as e:
+            if self.__verbose:
+                print('Error while communicating with the players: {}.'.format(e))
+
+    def run(self, host='0.0.0.0', port=5000):
+        '''Wait for the players of one game on 'host':'port' and play it.'''
+        try:
+            asyncio.run(self._runonce(host, port))
+        except KeyboardInterrupt:
+            _printsection('Game server ended')
+
+
+class GameLobby:
+    '''Server running many games at once in one asyncio event loop.
+
+    Players are accepted continuously and grouped by 'nbplayers', in the order
+    they connect, into games played by a new game server made by 'factory'.
+    '''
+    def __init__(self, factory, nbplayers, verbose=False):
+        self.__factory = factory
+        self.__nbplayers = nbplayers
+        self.__verbose = verbose
+        self.__waiting = []
+        self.__games = set()
+        # Stats about the games played
+        self.started = 0
+        self.finished = 0
+        self.results = {}
+
+    @property
+    def running(self):
+        return len(self.__games)
+
+    async def _accept(self, reader, writer):
+        # Forget the players who left while waiting for an opponent
+        self.__waiting = [player for player in self.__waiting if not player[0].at_eof()]
+        self.__waiting.append((reader, writer))
+        if len(self.__waiting) >= self.__nbplayers:
+            players = self.__waiting[:self.__nbplayers]
+            self.__waiting = self.__waiting[self.__nbplayers:]
+            self.started += 1
+            game = asyncio.create_task(self._play(self.started, players))
+            self.__games.add(game)
+            game.add_done_callback(self.__games.discard)
+
+    async def _play(self, number, players):
+        if self.__verbose:
+            print(' Game #{} started ({} running).'.format(number, self.running))
+        try:
+            winner = await self.__factory().play(players)
+        except OSError as e:
+            winner = -1
+            if self.__verbose:
+                print(' Game #{} aborted: {}.'.format(number, e))
+        except Exception:
+            # A bug of the state class or of the recorder only ends its game
+            winner = -1
+            print(' Game #{} aborted by an error:'.format(number), file=sys.stderr)
+            traceback.print_exc()
+        self.finished += 1
+        self.results[winner] = self.results.get(winner, 0) + 1
+        if self.__verbose and winner != -1:
+            print(' Game #{} finished: {}.'.format(number, 'draw' if winner is None else 'player {} won'.format(winner)))
+
+    async def serve(self, host='0.0.0.0', port=5000):
+        '''Accept players on 'host':'port' and play their games until cancelled.'''
+        listener = await asyncio.start_server(self._accept, host, port, reuse_address=True, backlog=LOBBY_BACKLOG)
+        if self.__verbose:
+            _printsection('Starting game lobby')
+            print(' Game server listening on {}:{}.'.format(host, port))
+        try:
+            await asyncio.Event().wait()
+        finally:
+            listener.close()
+            for game in list(self.__games):
+                game.cancel()
 
-    def run(self):
-        if self._waitplayers():
-            self._gameloop()
+    def run(self, host='0.0.0.0', port=5000):
+        try:
+            asyncio.run(self.serve(host, port))
+        except KeyboardInterrupt:
+            if self.__verbose:
+                _printsection('Game lobby ended')
+                print(' {} games started, {} finished.'.format(self.started, self.finished))
 
 
 class GameClient(metaclass=ABCMeta):
-    '''Abstract class representing a game client'''
-    def __init__(self, server, stateclass, verbose=False):
+    '''Abstract class representing a game client.
+
+    The 'name' is sent to the server in the READY message, and the 'binary'
+    encoding is asked for if 'encoding' is 'binary' (see GameServer). The
+    clock is always asked for: when _nextmove is called, '_clock' is the
+    (movetime, gametime) pair of the time in seconds for the move and left for
+    the game (None for no limit), or None if the server does not send it.
+
+    The time taken to parse each state, to choose the move and to encode it,
+    with the fields given by _movestats(), is recorded in 'metrics'.
+
+    The client plays 'games' games in a row when it is created (None: until
+    the server cannot be reached), keeping whatever its subclass learnt from
+    one game to the next. With 0, it only plays when play() or session() is
+    called: playsessions() plays with many clients at once in one process.
+    '''
+    def __init__(self, server, stateclass, verbose=False, name=None, encoding='json', metrics=None, games=1):
+        self.__server = server
         self.__stateclass = stateclass
         self.__verbose = verbose
+        self.__name = name
+        self.__encoding = encoding
+        self.__allmetrics = metrics or _NOMETRICS
+        self.__metrics = None
+        self.__binary = False
+        self.__clocked = False
+        self._clock = None
+        # State and move of the last PLAY, to ponder on once the move is sent
+        self.__played = None
+        # Stats about the games played
+        self.played = 0
+        if games is None or games > 0:
+            self.play(games)
+
+    def __newgame(self):
+        # Reset what the server said about the previous game
+        self.__metrics = self.__allmetrics.game()
+        self.__binary = False
+        self.__clocked = False
+        self._clock = None
+        self.__played = None
         if self.__verbose:
             _printsection('Starting game')
-        addrinfos = socket.getaddrinfo(*server, socket.AF_INET, socket.SOCK_STREAM)
-        s = socket.socket()
-        try:
-            s.connect(addrinfos[0][4])
+
+    def play(self, games=1):
+        '''Play 'games' games in a row (None: until the server cannot be reached),
+        connecting to the server again for each one, and return the number played.'''
+        played = 0
+        while games is None or played < games:
+            self.__newgame()
+            addrinfos = socket.getaddrinfo(*self.__server, socket.AF_INET, socket.SOCK_STREAM)
+            s = socket.socket()
+            try:
+                s.connect(addrinfos[0][4])
+            except OSError:
+                s.close()
+                print(' Impossible to connect to the game server on {}:{}.'.format(*addrinfos[0][4]))
+                break
             if self.__verbose:
                 print(' Connected to the game server on {}:{}.'.format(*addrinfos[0][4]))
-            self.__server = s
-            self._gameloop()
-        except OSError:
-            print(' Impossible to connect to the game server on {}:{}.'.format(*addrinfos[0][4]))
-
-    def _gameloop(self):
-        server = self.__server
-        running = True
-        while running:
-            data = server.recv(self.__stateclass.buffersize()).decode()
-            command = data[:data.index(' ')] if ' ' in data else data
-            if command == 'START':
-                self._playernb = int(data[data.index(' '):])
-                server.sendall('READY'.encode())
-                if self.__verbose:
-                    _printsection('Game started')
-                    print("   Player's number: {}".format(self._playernb))
-            elif command == 'PLAY':
-                state = self.__stateclass.parse(data[data.index(' ')+1:])
-                if self.__verbose:
-                    print("\n=> Player's turn to play")
-                    print('   State:')
-                    state.prettyprint()
-                move = self._nextmove(state)
-                if self.__verbose:
-                    print('   Move:', move)
-                server.sendall(move.encode())
-            elif command in ('WON', 'LOST', 'END'):
-                running = False
-                if self.__verbose:
-                    _printsection('Game finished')
-                    if command == 'WON':
-                        print(' You won the game.')
-                    elif command == 'LOST':
-                        print(' You lost the game.')
+            try:
+                if not self._gameloop(s):
+                    break
+            except OSError as e:
+                print(' Connection with the game server lost: {}.'.format(e))
+                break
+            played += 1
+        self.played += played
+        return played
+
+    async def session(self, games=1):
+        '''Play 'games' games in a row like play(), in an asyncio event loop. The
+        moves are chosen in another thread, so that the loop can go on with the
+        other sessions meanwhile.'''
+        played = 0
+        host, port = self.__server
+        while games is None or played < games:
+            self.__newgame()
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+            except OSError:
+                print(' Impossible to connect to the game server on {}:{}.'.format(host, port))
+                break
+            try:
+                while True:
+                    data = await readframe(reader)
+                    if data is None:
+                        break
+                    if data.startswith(b'PLAY'):
+                        reply, running = await asyncio.to_thread(self._process, data)
                     else:
-                        print(' It is draw.')
-                    _printsection('Game ended')
-                server.close()
-            else:
+                        reply, running = self._process(data)
+                    if reply is not None:
+                        writer.write(frame(reply))
+                        await writer.drain()
+                    if not running:
+                        break
+            except OSError:
+                data = None
+            finally:
+                writer.close()
+            if data is None:
                 if self.__verbose:
-                    print('Specific data received:', data)
-                self._handle(data)
+                    print(' Connection closed by the game server.')
+                break
+            played += 1
+        self.played += played
+        return played
+
+    def _gameloop(self, server):
+        # Play one game with 'server', the connected socket, and close it.
+        # Return whether the game went on to its end.
+        # The time of the opponent is used by _ponder while waiting for the server
+        reader = MessageReader(server, self.__stateclass.buffersize())
+        try:
+            while True:
+                data = reader.readframe()
+                self._stopponder()
+                if data is None:
+                    if self.__verbose:
+                        print(' Connection closed by the game server.')
+                    return False
+                reply, running = self._process(data)
+                if reply is not None:
+                    sendmessage(server, reply)
+                if running and self.__played is not None:
+                    self._ponder(*self.__played)
+                self.__played = None
+                if not running:
+                    return True
+        finally:
+            self._stopponder()
+            server.close()
+
+    def _process(self, data):
+        '''Handle a message of the server.
+        Pre: 'data' is a message received from the server, as bytes.
+        Post: The returned value is a (reply, running) pair with the message to send
+              back, or None, and whether the game goes on.
+        '''
+        command, _, payload = data.partition(b' ')
+        command = command.decode(errors='replace')
+        if command == 'START':
+            self._playernb = int(payload)
+            if self.__verbose:
+                _printsection('Game started')
+                print("   Player's number: {}".format(self._playernb))
+            return self._ready(), True
+        elif command == 'ENCODING':
+            self.__binary = payload == b'binary'
+            if self.__verbose:
+                print('   Encoding: {}'.format(payload.decode(errors='replace')))
+        elif command == 'CLOCK':
+            self.__clocked = True
+            if self.__verbose:
+                movetime, gametime = map(_seconds, payload.split(b' '))
+                print('   Time control: {} s per move, {} s per game'.format(movetime, gametime))
+        elif command == 'PLAY':
+            start = time.perf_counter()
+            if self.__clocked:
+                movetime, gametime, payload = payload.split(b' ', 2)
+                self._clock = (_seconds(movetime), _seconds(gametime))
+            if self.__binary:
+                state = self.__stateclass.frombytes(payload)
+            else:
+                state = self.__stateclass.parse(payload.decode())
+            parsed = time.perf_counter()
+            if self.__verbose:
+                print("\n=> Player's turn to play")
+                print('   State:')
+                state.prettyprint()
+            move = self._nextmove(state)
+            thought = time.perf_counter()
+            if self.__verbose:
+                print('   Move:', move)
+            message = self._encodemove(move)
+            self.__played = (state, move)
+            self.__metrics.turn(
+                parse=parsed - start, think=thought - parsed, encode=time.perf_counter() - thought, **self._movestats()
+            )
+            return message, True
+        elif command in ('WON', 'LOST', 'END'):
+            if self.__verbose:
+                _printsection('Game finished')
+                if command == 'WON':
+                    print(' You won the game.')
+                elif command == 'LOST':
+                    print(' You lost the game.')
+                else:
+                    print(' It is draw.')
+                _printsection('Game ended')
+            self.__metrics.end(result=command)
+            self._gameended(command)
+            return None, False
+        else:
+            data = data.decode(errors='replace')
+            if self.__verbose:
+                print('Specific data received:', data)
+            self._handle(data)
+        return None, True
+
+    def _ready(self):
+        words = ['READY']
+        if self.__name:
+            words.append(self.__name)
+        if self.__encoding == 'binary' and 'binary' in self.__stateclass.encodings():
+            words.append('encoding=binary')
+        words.append('clock=1')
+        return ' '.join(words)
+
+    def _movestats(self):
+        '''Fields about the last move given by _nextmove, added to its turn record.'''
+        return {}
+
+    def _gameended(self, result):
+        '''Called when the game ends, 'result' being 'WON', 'LOST' or 'END'.'''
+        pass
+
+    def _ponder(self, state, move):
+        '''Called once 'move', chosen in 'state', is sent, to think while the opponent
+        does. It must return at once, the work going on in another thread until
+        _stopponder is called. Only the blocking loop of play() ponders, not the
+        sessions, which already share the process.'''
+        pass
+
+    def _stopponder(self):
+        '''Called when a message of the server arrives, and at the end of a game:
+        stop pondering, returning only once it has stopped.'''
+        pass
+
+    def _encodemove(self, move):
+        # Moves are given as their JSON string or as the object it encodes
+        if self.__binary:
+            return self.__stateclass.movetobytes(json.loads(move) if isinstance(move, str) else move)
+        return move if isinstance(move, str) else json.dumps(move)
 
     @abstractmethod
     def _handle(self, command):
@@ -283,6 +821,14 @@ class GameClient(metaclass=ABCMeta):
         '''Get the next move to play.
         Pre: 'state' is a valid game' state.
         Post: The returned value contains a valid move to be played by this player
-              in the specified 'state' of the game.
+              in the specified 'state' of the game, as a JSON string or as the
+              object it encodes.
         '''
-        ...
\ No newline at end of file
+        ...
+
+
+async def playsessions(clients, games=1):
+    '''Play 'games' games with each client (see GameClient.session), all at once.
+    Post: The returned value is the list of the number of games played by each client.
+    '''
+    return await asyncio.gather(*(client.session(games) for client in clients))
@@ -0,0 +1,186 @@
+# gamelog.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import collections
+import json
+import os
+import queue
+import struct
+import threading
+
+# A log file starts with MAGIC and holds one record per game, each one made of
+# its size (FRAME), a header (the wall clock time of the start, the first
+# player, the winner, the flags and the number of turns) and, for each turn,
+# the size of the move (0 for an invalid move), the move and the time the
+# player took to send it in seconds
+MAGIC = b'QGL1'
+FRAME = struct.Struct('<I')
+HEADER = struct.Struct('<dBbBH')
+TURN = struct.Struct('<Bf')
+# Winner of a draw and of a game that was not played to the end
+DRAW = -2
+UNFINISHED = -1
+# Flags: the game was lost on time, the moves are JSON strings instead of the
+# binary encoding of the state class
+TIMEOUT = 1
+JSONMOVES = 2
+
+DEFAULT_MAXBYTES = 64 * 2**20
+DEFAULT_BACKUPS = 5
+BUFFER_SIZE = 2**16
+
+GameRecord = collections.namedtuple('GameRecord', 'start first winner timeout moves times')
+
+
+def encoderecord(start, first, winner, moves, times, timeout=False, jsonmoves=False):
+    '''Binary record of a game (see MAGIC), with its FRAME.
+    Pre: 'moves' are the encoded moves of the turns (None for an invalid move)
+         and 'times' the time taken by each of them. 'winner' is as given by
+         GameState.winner() (None for a draw, -1 if the game did not end).
+    '''
+    flags = (TIMEOUT if timeout else 0) | (JSONMOVES if jsonmoves else 0)
+    parts = [HEADER.pack(start, first, DRAW if winner is None else winner, flags, len(moves))]
+    for move, elapsed in zip(moves, times):
+        move = move or b''
+        parts.append(TURN.pack(len(move), elapsed))
+        parts.append(move)
+    body = b''.join(parts)
+    return FRAME.pack(len(body)) + body
+
+
+def decoderecord(body):
+    '''GameRecord of the binary record 'body' (without its FRAME), the moves being
+    those of the state class (see game.BinaryCodec.movefrombytes), or their JSON string
+    if they were recorded so, and None for invalid moves.'''
+    start, first, winner, flags, turns = HEADER.unpack_from(body, 0)
+    offset = HEADER.size
+    moves = []
+    times = []
+    for _ in range(turns):
+        size, elapsed = TURN.unpack_from(body, offset)
+        offset += TURN.size
+        move = bytes(body[offset:offset + size]) if size else None
+        offset += size
+        if move is not None and flags & JSONMOVES:
+            move = move.decode()
+        moves.append(move)
+        times.append(elapsed)
+    return GameRecord(start, first, None if winner == DRAW else winner, bool(flags & TIMEOUT), moves, times)
+
+
+class GameRecorder:
+    '''Append-only log of the games played by a server, in rotating files.
+
+    record() only encodes the game and queues it: a thread writes the records
+    through a buffer, flushed whenever the queue is empty. When a record would
+    make the file bigger than 'maxbytes', it is renamed 'path.1' (the previous
+    'path.1' becoming 'path.2' and so on, up to 'backups' files) and a new one
+    is started.
+    '''
+    def __init__(self, path, maxbytes=DEFAULT_MAXBYTES, backups=DEFAULT_BACKUPS):
+        self.path = path
+        self.maxbytes = maxbytes
+        self.backups = backups
+        self.__queue = queue.SimpleQueue()
+        self.__file = self.__open()
+        self.__thread = threading.Thread(target=self.__write, name='GameRecorder', daemon=True)
+        self.__thread.start()
+
+    def record(self, start, first, winner, moves, times, timeout=False, jsonmoves=False):
+        '''Queue the record of a game (see encoderecord).'''
+        self.__queue.put(encoderecord(start, first, winner, moves, times, timeout, jsonmoves))
+
+    def close(self):
+        '''Write the records queued so far and close the file.'''
+        if self.__thread is not None:
+            self.__queue.put(None)
+            self.__thread.join()
+            self.__thread = None
+
+    def __open(self):
+        file = open(self.path, 'ab', buffering=BUFFER_SIZE)
+        if file.tell() == 0:
+            file.write(MAGIC)
+        return file
+
+    def __rotate(self):
+        self.__file.close()
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                if os.path.exists('{}.{}'.format(self.path, i)):
+                    os.replace('{}.{}'.format(self.path, i), '{}.{}'.format(self.path, i + 1))
+            os.replace(self.path, self.path + '.1')
+        else:
+            os.remove(self.path)
+        self.__file = self.__open()
+
+    def __write(self):
+        file = self.__file
+        try:
+            while True:
+                data = self.__queue.get()
+                if data is None:
+                    break
+                if file.tell() > len(MAGIC) and file.tell() + len(data) > self.maxbytes:
+                    self.__rotate()
+                    file = self.__file
+                file.write(data)
+                if self.__queue.empty():
+                    file.flush()
+        finally:
+            self.__file.close()
+
+
+def logfiles(path):
+    '''Paths of the files of a rotating log, from the oldest to the current one.'''
+    backups = []
+    i = 1
+    while os.path.exists('{}.{}'.format(path, i)):
+        backups.append('{}.{}'.format(path, i))
+        i += 1
+    return backups[::-1] + ([path] if os.path.exists(path) else [])
+
+
+def readgames(path):
+    '''Generator of the GameRecord of the games of a log file, read one by one. A
+    record cut short at the end of the file (by a crash) is ignored.
+    Raises ValueError: If 'path' is not a game log.
+    '''
+    with open(path, 'rb', buffering=BUFFER_SIZE) as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{} is not a game log'.format(path))
+        while True:
+            frame = file.read(FRAME.size)
+            if len(frame) < FRAME.size:
+                return
+            size = FRAME.unpack(frame)[0]
+            body = file.read(size)
+            if len(body) < size:
+                return
+            yield decoderecord(body)
+
+
+def readlog(path):
+    '''Generator of the GameRecord of all the files of a rotating log, oldest first.'''
+    for file in logfiles(path):
+        yield from readgames(file)
+
+
+def replay(record, stateclass):
+    '''Generator replaying a game.
+    Pre: 'stateclass(currentPlayer=first)' builds the initial state of a game.
+    Post: It yields a (state, move) pair per turn, with the state given to the
+          player and the move it played (None if it was invalid), and then applies
+          the move. The same state object is updated from turn to turn.
+    '''
+    state = stateclass(currentPlayer=record.first)
+    for move in record.moves:
+        if isinstance(move, bytes):
+            move = stateclass.movefrombytes(move)
+        elif move is not None:
+            move = json.loads(move)
+        yield state, move
+        if move is not None:
+            state.applymove(move)
+        state.nextPlayer()
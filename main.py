@@ -4,20 +4,44 @@
 # Version: March 29, 2018
 
 import argparse
+import asyncio
+import functools
 import socket
 import sys
 import random
 import json
-import copy
 #from simpleai import SearchProblem, greedy
+import threading
+import time
 
+import analysis
+import bitboard
 import game
+import gamelog
+import mcts
+import metrics
+import openingbook
+import parallel
+import positioncache
+import search
+import symmetry
+import tablebase
+import timecontrol
+import transposition
 
-class QuartoState(game.GameState):
+# In MCTS mode, positions with at most that many empty squares are searched with
+# alpha-beta, which solves them within a second
+ENDGAMESIZE = 9
+# Entries of the transposition table written to the position cache at the end of
+# a game must come from searches at least that deep
+CACHEDEPTH = 3
+# Share of the movetime spent guessing the reply of the opponent when pondering
+PONDERGUESS = 0.1
+
+class QuartoState(game.GameState, game.BinaryCodec):
     '''Class representing a state for the Quarto game.'''
     def __init__(self, initialstate=None, currentPlayer=None):
         self.__player = 0
-        random.seed()
         if initialstate is None:
             pieces = []
             for shape in ['round', 'square']:
@@ -38,55 +62,173 @@ class QuartoState(game.GameState):
             }
 
         if currentPlayer is None:
+            random.seed()
             currentPlayer = random.randrange(2)
 
         super().__init__(initialstate, currentPlayer=currentPlayer) #utilise l'init de GameState
+        self.__track()
+
+    def __track(self):
+        # The lines are tracked as in bitboard.QuartoBitboard: the number of pieces
+        # and the pattern of each line, updated on each move, with the number of
+        # Quartos and the mask of the pieces completing a line of three ("deadly"
+        # pieces), computed when it is first needed after a move
+        state = self._state['visible']
+        self.__codes = [bitboard.NOPIECE] * 16
+        self.__counts = [0] * len(bitboard.LINES)
+        self.__patterns = [255] * len(bitboard.LINES)
+        # Each piece is either on the board or remaining
+        self.__remaining = bitboard.ALLPIECES
+        self.__threats = None
+        self.__quartos = 0
+        for pos, piece in enumerate(state['board']):
+            if piece is not None:
+                self.__place(pos, bitboard.encodepiece(piece))
+
+    def __place(self, pos, code):
+        self.__codes[pos] = code
+        self.__remaining &= ~(1 << code)
+        self.__threats = None
+        counts = self.__counts
+        patterns = self.__patterns
+        pattern = bitboard.PATTERN[code]
+        for l in bitboard.SQUARELINES[pos]:
+            counts[l] += 1
+            patterns[l] &= pattern
+            if counts[l] == 4 and patterns[l]:
+                self.__quartos += 1
+
+    def __remove(self, pos, patterns):
+        # An AND cannot be undone: the 'patterns' from before the piece was placed are restored
+        self.__remaining |= 1 << self.__codes[pos]
+        self.__codes[pos] = bitboard.NOPIECE
+        self.__threats = None
+        counts = self.__counts
+        for l in bitboard.SQUARELINES[pos]:
+            if counts[l] == 4 and self.__patterns[l]:
+                self.__quartos -= 1
+            counts[l] -= 1
+        self.__patterns = patterns
+
+    def threats(self):
+        '''Mask of the codes of the pieces that would complete a Quarto if placed now
+        (see bitboard.encodepiece).'''
+        if self.__threats is None:
+            # A piece may be deadly on several lines of three
+            threats = 0
+            counts = self.__counts
+            patterns = self.__patterns
+            for l in range(len(bitboard.LINES)):
+                if counts[l] == 3:
+                    threats |= bitboard.COMPLETING[patterns[l]]
+            self.__threats = threats
+        return self.__threats
+
+    def hasquarto(self):
+        '''Check whether four pieces sharing an attribute are aligned somewhere on the board.'''
+        return self.__quartos > 0
+
+    @property
+    def remaining(self):
+        '''Mask of the codes of the pieces not on the board, the piece to play included.'''
+        return self.__remaining
+
+    def safepieces(self):
+        '''Mask of the codes of the remaining pieces that cannot complete a Quarto if
+        given now, none of them being safe if there is already a Quarto on the board.'''
+        if self.__quartos:
+            return 0
+        return self.__remaining & ~self.threats()
 
     def applymove(self, move):
         #{pos: 8, quarto: true, nextPiece: 2}
-        stateBackup = copy.deepcopy(self._state)
-        try:
-            state = self._state['visible']
-            if state['pieceToPlay'] is not None:
-                try:
-                    if state['board'][move['pos']] is not None:
-                        raise game.InvalidMoveException('The position is not free')
-                    state['board'][move['pos']] = state['remainingPieces'][state['pieceToPlay']]
-                    del(state['remainingPieces'][state['pieceToPlay']])
-                except game.InvalidMoveException as e:
-                    raise e
-                except:
-                    raise game.InvalidMoveException("Your move should contain a \"pos\" key in range(16)")
-
-            if len(state['remainingPieces']) > 0:
-                try:
-                    state['pieceToPlay'] = move['nextPiece']
-                except:
-                    raise game.InvalidMoveException("You must specify the next piece to play")
-            else:
-                state['pieceToPlay'] = None
+        self.makemove(move)
 
-            if 'quarto' in move:
-                state['quartoAnnounced'] = move['quarto']
-                winner = self.winner()
-                if winner is None or winner == -1:
-                    raise game.InvalidMoveException("There is no Quarto !")
-            else:
-                state['quartoAnnounced'] = False
-        except game.InvalidMoveException as e:
-            self._state = stateBackup
-            raise e
+    def tobytes(self):
+        # The remaining pieces are kept in the order of their codes, so a mask is enough
+        state = self._state['visible']
+        remaining = [bitboard.encodepiece(piece) for piece in state['remainingPieces']]
+        board = [bitboard.NOPIECE if piece is None else bitboard.encodepiece(piece) for piece in state['board']]
+        piece = bitboard.NOPIECE if state['pieceToPlay'] is None else remaining[state['pieceToPlay']]
+        return bitboard.packstate(board, sum(1 << code for code in remaining), piece, state['quartoAnnounced'], self.currentplayer)
 
-    
-    def _same(self, feature, elems):
-        try:
-            elems = list(map(lambda piece: piece[feature], elems))
-        except:
-            return False
-        return all(e == elems[0] for e in elems)
+    @classmethod
+    def frombytes(cls, data):
+        board, remaining, piece, quarto, player = bitboard.unpackstate(data)
+        codes = [code for code in range(16) if remaining >> code & 1]
+        return cls({
+            'board': [None if code == bitboard.NOPIECE else bitboard.decodepiece(code) for code in board],
+            'remainingPieces': [bitboard.decodepiece(code) for code in codes],
+            'pieceToPlay': None if piece == bitboard.NOPIECE else codes.index(piece),
+            'quartoAnnounced': quarto
+        }, currentPlayer=player)
+
+    @classmethod
+    def movetobytes(cls, move):
+        return bitboard.packmove(move)
+
+    @classmethod
+    def movefrombytes(cls, data):
+        return bitboard.unpackmove(data)
+
+    def makemove(self, move):
+        '''Apply a move in place, without copying the state.
+        Pre: -
+        Post: The specified 'move' has been applied and the returned token can be
+              given to unmakemove to undo it. The state is unchanged if 'move' is invalid.
+        Raises InvalidMoveException: If 'move' is invalid.
+        '''
+        if not isinstance(move, dict):
+            raise game.InvalidMoveException('A valid move must be a JSON object')
+        state = self._state['visible']
+        pos = None
+        count = len(state['remainingPieces'])
+        if state['pieceToPlay'] is not None:
+            pos = move.get('pos')
+            if not isinstance(pos, int) or not 0 <= pos < 16:
+                raise game.InvalidMoveException("Your move should contain a \"pos\" key in range(16)")
+            if state['board'][pos] is not None:
+                raise game.InvalidMoveException('The position is not free')
+            count -= 1
+
+        nextPiece = None
+        if count > 0:
+            if 'nextPiece' not in move:
+                raise game.InvalidMoveException("You must specify the next piece to play")
+            nextPiece = move['nextPiece']
+            if not isinstance(nextPiece, int) or not 0 <= nextPiece < count:
+                raise game.InvalidMoveException("Your move should contain a \"nextPiece\" key in range({})".format(count))
+
+        token = (pos, state['pieceToPlay'], state['quartoAnnounced'], None if pos is None else list(self.__patterns))
+        if pos is not None:
+            state['board'][pos] = state['remainingPieces'].pop(state['pieceToPlay'])
+            self.__place(pos, bitboard.encodepiece(state['board'][pos]))
+        state['pieceToPlay'] = nextPiece
+
+        if 'quarto' in move:
+            state['quartoAnnounced'] = move['quarto']
+            winner = self.winner()
+            if winner is None or winner == -1:
+                self.unmakemove(token)
+                raise game.InvalidMoveException("There is no Quarto !")
+        else:
+            state['quartoAnnounced'] = False
+        return token
+
+    def unmakemove(self, token):
+        '''Undo a move applied with makemove.
+        Pre: 'token' was returned by the last makemove not undone yet.
+        Post: The state is the same as before that move.
+        '''
+        pos, pieceToPlay, quartoAnnounced, patterns = token
+        state = self._state['visible']
+        if pos is not None:
+            state['remainingPieces'].insert(pieceToPlay, state['board'][pos])
+            state['board'][pos] = None
+            self.__remove(pos, patterns)
+        state['pieceToPlay'] = pieceToPlay
+        state['quartoAnnounced'] = quartoAnnounced
 
-    def _quarto(self, elems):
-        return self._same('shape', elems) or self._same('color', elems) or self._same('filling', elems) or self._same('height', elems)
     
     def winner(self):
         state = self._state['visible']
@@ -98,18 +240,9 @@ class QuartoState(game.GameState):
         # 08 09 10 11
         # 12 13 14 15
 
-        if state['quartoAnnounced']:
-            # Check horizontal and vertical lines
-            for i in range(4):
-                if self._quarto([board[4 * i + e] for e in range(4)]):
-                    return player
-                if self._quarto([board[4 * e + i] for e in range(4)]):
-                    return player
-            # Check diagonals
-            if self._quarto([board[5 * e] for e in range(4)]):
-                return player
-            if self._quarto([board[3 + 3 * e] for e in range(4)]):
-                return player
+        # Full lines with a shared attribute are counted on each move
+        if state['quartoAnnounced'] and self.__quartos:
+            return player
         return None if board.count(None) == 0 else -1
     
     def displayPiece(self, piece):
@@ -146,122 +279,357 @@ class QuartoState(game.GameState):
 
 class QuartoServer(game.GameServer):
     '''Class representing a server for the Quarto game.'''
-    def __init__(self, verbose=False):
-        super().__init__('Quarto', 2, QuartoState(), verbose=verbose)
+    def __init__(self, verbose=False, movetime=None, gametime=None, metrics=None, recorder=None):
+        super().__init__('Quarto', 2, QuartoState(), verbose=verbose, movetime=movetime, gametime=gametime, metrics=metrics, recorder=recorder)
     
     def applymove(self, move):
-        try:
-            move = json.loads(move)
-        except:
-            raise game.InvalidMoveException('A valid move must be a valid JSON string')
+        # Moves of the players using the binary encoding are already decoded
+        if isinstance(move, str):
+            try:
+                move = json.loads(move)
+            except:
+                raise game.InvalidMoveException('A valid move must be a valid JSON string')
+        visible = self._state._state['visible']
+        placed = visible['pieceToPlay'] is not None
+        self._state.applymove(move)
+        # The position of the first move and the piece given at the last one are ignored
+        applied = {}
+        if placed:
+            applied['pos'] = move['pos']
+        if visible['pieceToPlay'] is not None:
+            applied['nextPiece'] = move['nextPiece']
+        if move.get('quarto'):
+            applied['quarto'] = True
+        return applied
+
+
+class QuartoPlayer:
+    '''Artificial intelligence choosing the moves of a Quarto player.
+
+    The move is read from the opening book or the endgame tablebase when the
+    position is in one of them, and searched otherwise. With the 'mcts'
+    engine, positions with more than ENDGAMESIZE empty squares are searched
+    with Monte Carlo tree search (limited to 'playouts' playouts per move if
+    given), and the others with alpha-beta. 'stats' describes the last move:
+    where it comes from and, for a search, the number of nodes (playouts for
+    MCTS), the depth, the value and the probes and hits of the transposition
+    table.
+
+    With a 'cachefile' (see positioncache.PositionCache), the transposition
+    table is warmed with the most recently used entries of the cache, solved
+    positions are played from it without searching, and endgame() writes the
+    positions solved and the deep entries of the table back to it.
+
+    fork() makes players sharing the book, the tablebase and the table of this
+    one, to play other games at the same time (see game.playsessions).
+
+    With 'ponder', ponder() guesses the reply of the opponent and searches the
+    position it leads to in another thread, until stopponder() is called. If
+    the opponent plays that reply, the move found is played at once when it
+    was searched at least as long as the move may last (or solved), and the
+    search only goes on for the rest of the time otherwise. Either way, the
+    transposition table is filled with the positions searched meanwhile.
+    '''
+    def __init__(self, movetime=1.0, tablesize=transposition.DEFAULT_SIZE, workers=1, tablebasefile=None, bookfile=None, engine='alphabeta', playouts=None, cachefile=None, cachesize=positioncache.DEFAULT_ENTRIES, ponder=False):
+        self.__book = None if bookfile is None else openingbook.OpeningBook(bookfile)
+        self.__tablebase = None if tablebasefile is None else tablebase.Tablebase(tablebasefile)
+        self.__cache = None if cachefile is None else positioncache.PositionCache(cachefile, cachesize)
+        self.__cachefile = cachefile
+        self.__cachesize = cachesize
+        # The book and the tablebase are closed by the player owning them, not by its forks
+        self.__forked = False
+        if workers > 1:
+            self.search = parallel.ParallelSearch(movetime, workers, tablesize)
         else:
-            self._state.applymove(move)
+            self.search = search.QuartoSearch(movetime, tablesize)
+        self.__mcts = None
+        if engine == 'mcts':
+            self.__mcts = mcts.MonteCarloSearch(movetime, playouts)
+        elif engine != 'alphabeta':
+            raise ValueError('Unknown engine: {}'.format(engine))
+        self.pondering = ponder and isinstance(self.search, search.QuartoSearch)
+        self.__ponderer = None
+        # Key of the position pondered on, its best move, the time searched, whether
+        # it is solved, and the depth and value reached
+        self.__pondered = None
+        self.stats = {}
+        table = getattr(self.search, 'table', None)
+        if self.__cache is not None and table is not None:
+            # Only the positions stored under their canonical key are probed by the search
+            for key, depth, value, flag, move in self.__cache.entries(table.buckets, self.search.canonicalsize):
+                table.put(~key, depth, value, flag, move)
+
+    def fork(self):
+        '''New player with its own searches and connection to the position cache, sharing
+        the book, the tablebase and the transposition table of this one, so that both
+        can choose moves at the same time in different threads. It must be closed
+        before this one.
+        Raises ValueError: If this player searches with many processes.
+        '''
+        if isinstance(self.search, parallel.ParallelSearch):
+            raise ValueError('A parallel search cannot be shared')
+        player = QuartoPlayer.__new__(QuartoPlayer)
+        player.__book = self.__book
+        player.__tablebase = self.__tablebase
+        player.__cache = None if self.__cachefile is None else positioncache.PositionCache(self.__cachefile, self.__cachesize)
+        player.__cachefile = self.__cachefile
+        player.__cachesize = self.__cachesize
+        player.__forked = True
+        player.search = search.QuartoSearch(self.search.movetime, canonicalsize=self.search.canonicalsize, table=self.search.table)
+        player.__mcts = None
+        if self.__mcts is not None:
+            player.__mcts = mcts.MonteCarloSearch(self.__mcts.movetime, self.__mcts.playouts, exploration=self.__mcts.exploration)
+        player.pondering = False
+        player.__ponderer = None
+        player.__pondered = None
+        player.stats = {}
+        return player
+
+    def ponder(self, state, move):
+        '''Start pondering on the position reached by 'move', played in the QuartoBitboard
+        'state', in another thread, if it is enabled and the next move of this player is
+        searched with alpha-beta.'''
+        if not self.pondering or self.__ponderer is not None:
+            return
+        board = state.copy()
+        board.applymove(move)
+        if board.winner() != -1 or board.piece == bitboard.NOPIECE:
+            return
+        if self.__mcts is not None and board.empty.bit_count() - 1 > ENDGAMESIZE:
+            return
+        self.__pondered = None
+        self.search.stopped = False
+        self.__ponderer = threading.Thread(target=self.__ponder, args=(board,), daemon=True)
+        self.__ponderer.start()
+
+    def __ponder(self, board):
+        # Guess the reply of the opponent with a short search, then search the
+        # position it leads to until stopped
+        pos, piece, quarto = self.search.bestmove(board, PONDERGUESS * self.search.movetime)
+        if quarto or piece is None or self.search.stopped:
+            return
+        board.place(pos)
+        board.give(piece)
+        start = time.perf_counter()
+        move = self.search.bestmove(board, float('inf'))
+        solved = self.search.depth >= board.empty.bit_count() or abs(self.search.value) > search.SCORE
+        self.__pondered = (board.zobrist, move, time.perf_counter() - start, solved, self.search.depth, self.search.value)
+
+    def stopponder(self):
+        '''Stop the search started by ponder(), returning once it has stopped.'''
+        if self.__ponderer is None:
+            return
+        # The search checks the flag along with its clock, every few milliseconds
+        self.search.stopped = True
+        self.__ponderer.join()
+        self.__ponderer = None
+        self.search.stopped = False
+
+    def close(self):
+        self.stopponder()
+        if isinstance(self.search, parallel.ParallelSearch):
+            self.search.close()
+        tables = (self.__cache,) if self.__forked else (self.__book, self.__tablebase, self.__cache)
+        for table in tables:
+            if table is not None:
+                table.close()
+
+    def endgame(self):
+        '''Write the results of the game to the position cache, if there is one.'''
+        if self.__cache is None:
+            return
+        table = getattr(self.search, 'table', None)
+        if table is not None:
+            for key, depth, value, flag, move in table.entries():
+                if key < 0 and depth >= CACHEDEPTH:
+                    self.__cache.put(~key, depth, value, flag, move)
+        self.__cache.flush()
+
+    def nextmove(self, state, movetime=None):
+        '''Choose the move to play, searching it 'movetime' seconds (by default, the
+        movetime given at creation).
+        Pre: 'state' is a QuartoBitboard of a game going on.
+        Post: The returned value is the move to play, as the object of its JSON encoding.
+        '''
+        move = None
+        if self.__book is not None:
+            move = self.__book.bestmove(state)
+            self.stats = {'source': 'book'}
+        if move is None and self.__tablebase is not None:
+            move = self.__tablebase.bestmove(state)
+            self.stats = {'source': 'tablebase'}
+        key = transform = None
+        if move is None and self.__cache is not None and state.piece != bitboard.NOPIECE:
+            key, transform = symmetry.canonical(state)
+            entry = self.__cache.get(key)
+            # Bounds only seed the transposition table: their move may lose
+            if entry is not None and entry[0] >= state.empty.bit_count() and entry[2] == transposition.EXACT and entry[3] is not None:
+                move = symmetry.fromcanonical(transform, *entry[3]) + (False,)
+                self.stats = {'source': 'cache', 'value': entry[1]}
+        pondered, self.__pondered = self.__pondered, None
+        if move is None and pondered is not None and pondered[0] == state.zobrist:
+            # The opponent played the reply pondered on: play its move if it was
+            # searched long enough, go on searching the rest of the time otherwise
+            _, ponderedmove, elapsed, solved, depth, value = pondered
+            movetime = self.search.movetime if movetime is None else movetime
+            if solved or elapsed >= movetime:
+                move = ponderedmove
+                self.stats = {'source': 'ponder', 'depth': depth, 'value': value}
+            else:
+                movetime -= elapsed
+        if move is None:
+            engine = self.search
+            if self.__mcts is not None and state.empty.bit_count() > ENDGAMESIZE:
+                engine = self.__mcts
+            table = getattr(engine, 'table', None)
+            probes, hits = (table.probes, table.hits) if table is not None else (0, 0)
+            start = time.perf_counter()
+            move = engine.bestmove(state, movetime)
+            elapsed = time.perf_counter() - start
+            self.stats = {
+                'source': 'mcts' if engine is self.__mcts else 'search', 'nodes': engine.nodes,
+                'nps': engine.nodes / max(elapsed, 1e-9), 'depth': engine.depth, 'value': engine.value
+            }
+            if table is not None:
+                self.stats['tableprobes'] = table.probes - probes
+                self.stats['tablehits'] = table.hits - hits
+            size = state.empty.bit_count()
+            if key is not None and engine is self.search and not move[2] and (engine.depth >= size or engine.value > search.SCORE):
+                # Solved: searched to the end, or a win was found
+                self.__cache.put(key, size, engine.value, transposition.EXACT, symmetry.tocanonical(transform, *move[:2]))
+        pos, piece, quarto = move
+        return state.tomove(pos, piece, quarto)
 
 
 class QuartoClient(game.GameClient):
-    '''Class representing a client for the Quarto game.'''
-    def __init__(self, name, server, verbose=False):
-        super().__init__(server, QuartoState, verbose=verbose)
+    '''Class representing a client for the Quarto game.
+
+    It plays 'games' games when it is created (see game.GameClient), and is
+    closed afterwards unless it is 0. It chooses its moves with 'player' if it
+    is given, a QuartoPlayer made from the other parameters otherwise.
+    '''
+    def __init__(self, name, server, verbose=False, movetime=1.0, tablesize=transposition.DEFAULT_SIZE, workers=1, tablebasefile=None, bookfile=None, encoding='json', metrics=None, engine='alphabeta', playouts=None, cachefile=None, cachesize=positioncache.DEFAULT_ENTRIES, games=1, player=None):
         self.__name = name
-    
-    def _handle(self, message):
-        pass
+        self.__player = player or QuartoPlayer(movetime, tablesize, workers, tablebasefile, bookfile, engine, playouts, cachefile, cachesize)
+        self.__timemanager = timecontrol.TimeManager(movetime)
+        try:
+            super().__init__(server, bitboard.QuartoBitboard, verbose=verbose, name=name, encoding=encoding, metrics=metrics, games=games)
+        finally:
+            if games != 0:
+                self.close()
 
-    def isBadPiece (self, state, pieceIndex, prevMove): #a bad piece makes the oponent win
-        stateCopy = copy.deepcopy (state) 
-        if (prevMove >=0):                              #allows to take into account the move the player just made
-            prevMove = {'pos': prevMove, 'nextPiece':0}
-            stateCopy.applymove (prevMove)  
-
-        nextPiece = state._state['visible']['remainingPieces'][pieceIndex]
-        for i in range(4):
-            elements = [stateCopy._state['visible']['board'][4 * i + e] for e in range(4)]
-            try : 
-                elements[elements.index (None)] = nextPiece # put the next piece in an available spot for a combinaison
-            except ValueError : # ValueError is raised if no None available in the list of elements => all spots are taken 
-                pass
-            if stateCopy._quarto(elements):
-                return True
-            elements = [stateCopy._state['visible']['board'][4 * e + i] for e in range(4)]
-            try :
-                elements[elements.index (None)] = nextPiece
-            except ValueError :
-                pass
-            if stateCopy._quarto(elements):
-                return True
-            # Check diagonals
-            elements = [stateCopy._state['visible']['board'][5 * e] for e in range(4)]
-            try:
-                elements[elements.index (None)] = nextPiece
-            except ValueError :
-                pass
-            if stateCopy._quarto(elements):
-                return True
-            elements = [stateCopy._state['visible']['board'][3 + 3 * e] for e in range(4)]
-            try :
-                elements[elements.index (None)] = nextPiece
-            except ValueError:
-                pass
-            if stateCopy._quarto(elements):
-                return True
-        del (stateCopy)
-        return False 
+    @property
+    def player(self):
+        return self.__player
+
+    def close(self):
+        self.__player.close()
     
-    def winningMove (self, state, pieceToPlay):
+    def _handle(self, message):
         pass
 
-    
     def _nextmove(self, state):
-        visible = state._state['visible']
-        move = {}
-        movePos = -1
+        # The state is read as a QuartoBitboard, in JSON or binary encoding
+        movetime = self.__timemanager.allocate(state.empty.bit_count(), self._clock)
+        return self.__player.nextmove(state, movetime)
 
-        # select the first free position
-        if visible['pieceToPlay'] is not None:
-            move['pos'] = visible['board'].index(None)
-            movePos = move['pos']
-
-        # select the first remaining piece that won't let the oponent win
-        nbrOfPieces = len(visible['remainingPieces'])
-        for p in range (nbrOfPieces):
-            print ('p : ', p,' = ', visible['remainingPieces'][p], self.isBadPiece (state, p, movePos) )
-            if not self.isBadPiece (state, p, movePos):
-                move ['nextPiece'] = p
-                break
-            elif (p == (nbrOfPieces-1)): # after testing all possible solutions, if none are good moves,
-                move ['nextPiece'] = p   # you probably lost => choose the last piece anyway 
-                                         # (it doesn't make a difference whether it's a good or a bad piece)
-
-        # apply the move to check for quarto
-        # applymove will raise if we announce a quarto while there is not
-        move['quarto'] = True
-        try:
-            state.applymove(move)
-        except:
-            del(move['quarto'])
-        
-        # send the move
-        return json.dumps(move)
+    def _movestats(self):
+        return self.__player.stats
+
+    def _gameended(self, result):
+        self.__player.endgame()
+
+    def _ponder(self, state, move):
+        self.__player.ponder(state, move)
+
+    def _stopponder(self):
+        self.__player.stopponder()
 
 
 if __name__ == '__main__':
     # Create the top-level parser
     parser = argparse.ArgumentParser(description='Quarto game')
-    subparsers = parser.add_subparsers(description='server client', help='Quarto game components', dest='component')
+    subparsers = parser.add_subparsers(description='server client analyze', help='Quarto game components', dest='component')
     # Create the parser for the 'server' subcommand
     server_parser = subparsers.add_parser('server', help='launch a server')
     server_parser.add_argument('--host', help='hostname (default: localhost)', default='localhost')
-    server_parser.add_argument('--port', help='port to listen on (default: 5000)', default=5000)
+    server_parser.add_argument('--port', help='port to listen on (default: 5000)', type=int, default=5000)
+    server_parser.add_argument('--movetime', help='time allowed for each move in seconds (default: no limit)', type=float, default=None)
+    server_parser.add_argument('--gametime', help='time allowed for all the moves of a player in seconds (default: no limit)', type=float, default=None)
+    server_parser.add_argument('--concurrent', help='keep accepting players and play their games concurrently', action='store_true')
+    server_parser.add_argument('--metrics', help='append measures of the games to this file as JSON lines', default=None)
+    server_parser.add_argument('--record', help='append the games to this log file, see gamelog.py', default=None)
+    server_parser.add_argument('--recordsize', help='size of the log file before it is rotated in MB (default: 64)', type=int, default=64)
+    server_parser.add_argument('--profile', help='profile the server with cProfile and write the stats to this file', default=None)
     server_parser.add_argument('--verbose', action='store_true')
     # Create the parser for the 'client' subcommand
     client_parser = subparsers.add_parser('client', help='launch a client')
     client_parser.add_argument('name', help='name of the player')
     client_parser.add_argument('--host', help='hostname of the server (default: localhost)', default='127.0.0.1')
-    client_parser.add_argument('--port', help='port of the server (default: 5000)', default=5000)
+    client_parser.add_argument('--port', help='port of the server (default: 5000)', type=int, default=5000)
+    client_parser.add_argument('--movetime', help='time to search each move when the server has no clock, in seconds (default: 1)', type=float, default=1.0)
+    client_parser.add_argument('--tablesize', help='memory for the transposition table in MB (default: 64)', type=int, default=64)
+    client_parser.add_argument('--workers', help='number of processes searching each move (default: 1)', type=int, default=1)
+    client_parser.add_argument('--tablebase', help='endgame tablebase file built with tablebase.py', default=None)
+    client_parser.add_argument('--book', help='opening book file built with openingbook.py', default=None)
+    client_parser.add_argument('--cache', help='position cache file shared by the clients, created if needed', default=None)
+    client_parser.add_argument('--cachesize', help='maximum number of positions in the cache (default: 1000000)', type=int, default=positioncache.DEFAULT_ENTRIES)
+    client_parser.add_argument('--mcts', help='search the opening and the middle game with Monte Carlo tree search', action='store_true')
+    client_parser.add_argument('--playouts', help='maximum number of MCTS playouts per move (default: no limit)', type=int, default=None)
+    client_parser.add_argument('--games', help='number of games to play in a row, 0 to play until the server is gone (default: 1)', type=int, default=1)
+    client_parser.add_argument('--sessions', help='number of games played at once, sharing the tables (default: 1)', type=int, default=1)
+    client_parser.add_argument('--ponder', help="search on the opponent's time", action='store_true')
+    client_parser.add_argument('--binary', help='ask the server for the binary encoding of states and moves', action='store_true')
+    client_parser.add_argument('--metrics', help='append measures of the game to this file as JSON lines', default=None)
+    client_parser.add_argument('--profile', help='profile the client with cProfile and write the stats to this file', default=None)
     client_parser.add_argument('--verbose', action='store_true')
+    # Create the parser for the 'analyze' subcommand
+    analyze_parser = subparsers.add_parser('analyze', help='annotate the moves of the games recorded by a server')
+    analyze_parser.add_argument('log', help='game log written by the server with --record')
+    analyze_parser.add_argument('output', help='file where to write the annotations as JSON lines')
+    analyze_parser.add_argument('--movetime', help='time to search each position in seconds (default: 0.1)', type=float, default=analysis.DEFAULT_MOVETIME)
+    analyze_parser.add_argument('--depth', help='maximum depth of the searches in plies (default: no limit)', type=int, default=None)
+    analyze_parser.add_argument('--workers', help='number of processes (default: one per CPU)', type=int, default=None)
+    analyze_parser.add_argument('--tablesize', help='memory for the transposition table of each process in MB (default: 64)', type=int, default=64)
+    analyze_parser.add_argument('--checkpoint', help='checkpoint file to resume from (default: the output file with .checkpoint)', default=None)
+    analyze_parser.add_argument('--profile', help='profile the analysis with cProfile and write the stats to this file', default=None)
+    analyze_parser.add_argument('--verbose', action='store_true')
+    analyze_parser.set_defaults(metrics=None)
     # Parse the arguments of sys.args
     args = parser.parse_args()
-    if args.component == 'server':
-        QuartoServer(verbose=args.verbose).run()
-    else:
-        QuartoClient(args.name, (args.host, args.port), verbose=args.verbose)
\ No newline at end of file
+    measures = metrics.Metrics(args.metrics, args.component)
+    with metrics.profiled(args.profile):
+        if args.component == 'server':
+            recorder = None if args.record is None else gamelog.GameRecorder(args.record, args.recordsize * 2**20)
+            if args.concurrent:
+                factory = functools.partial(QuartoServer, movetime=args.movetime, gametime=args.gametime, metrics=measures, recorder=recorder)
+                game.GameLobby(factory, 2, verbose=args.verbose).run(args.host, args.port)
+            else:
+                QuartoServer(verbose=args.verbose, movetime=args.movetime, gametime=args.gametime, metrics=measures, recorder=recorder).run(args.host, args.port)
+            if recorder is not None:
+                recorder.close()
+        elif args.component == 'analyze':
+            analyzer = analysis.Analyzer(args.movetime, args.depth, args.workers, args.tablesize * 2**20)
+            analyzer.run(args.log, args.output, args.checkpoint, args.verbose)
+        else:
+            if args.sessions > 1 and args.workers > 1:
+                parser.error('--sessions cannot be used with --workers')
+            games = args.games or None
+            options = dict(
+                verbose=args.verbose, movetime=args.movetime, encoding='binary' if args.binary else 'json', metrics=measures
+            )
+            player = QuartoPlayer(args.movetime, args.tablesize * 2**20, args.workers, args.tablebase, args.book, 'mcts' if args.mcts else 'alphabeta', args.playouts, args.cache, args.cachesize, args.ponder)
+            if args.sessions > 1:
+                players = [player] + [player.fork() for _ in range(args.sessions - 1)]
+                clients = [QuartoClient('{}#{}'.format(args.name, i + 1), (args.host, args.port), games=0, player=seat, **options) for i, seat in enumerate(players)]
+                try:
+                    asyncio.run(game.playsessions(clients, games))
+                except KeyboardInterrupt:
+                    pass
+                finally:
+                    # The forks first, the first player owning the shared tables
+                    for client in reversed(clients):
+                        client.close()
+            else:
+                QuartoClient(args.name, (args.host, args.port), games=games, player=player, **options)
+    measures.close()
\ No newline at end of file
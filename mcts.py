@@ -0,0 +1,274 @@
+# mcts.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import math
+import random
+import time
+
+import bitboard
+from bitboard import COMPLETING, NOPIECE, PATTERN, SQUARELINES, lowest
+
+# Exploration constant of UCT, for rewards between 0 and 1
+EXPLORATION = 0.7
+# The clock is read once every that many playouts
+CHECKPERIOD = 16
+
+_LINES = range(len(bitboard.LINES))
+
+
+def _threats(counts, patterns):
+    # Mask of the pieces completing a Quarto on the lines described by 'counts'
+    # and 'patterns' (see QuartoBitboard.threats)
+    pieces = 0
+    for l in _LINES:
+        if counts[l] == 3:
+            pieces |= COMPLETING[patterns[l]]
+    return pieces
+
+
+def playout(counts, patterns, squares, pieces, piece, rng):
+    '''Play a game at random to its end.
+    Pre: 'counts' and 'patterns' describe the lines (see QuartoBitboard.lines),
+         'squares' is the list of the empty squares, 'pieces' the list of the
+         remaining pieces other than 'piece', the piece to play. They are
+         modified by the playout.
+    Post: The returned value is 1 if the player to move wins, -1 if it loses
+          and 0 for a draw. Each player places its piece where it completes a
+          Quarto if it can, at random otherwise, then gives a random piece.
+    '''
+    result = 1
+    uniform = rng.random
+    while True:
+        for l in _LINES:
+            if counts[l] == 3 and COMPLETING[patterns[l]] >> piece & 1:
+                return result
+        n = len(squares)
+        if n == 1:
+            return 0
+        i = int(uniform() * n)
+        pos = squares[i]
+        squares[i] = squares[-1]
+        squares.pop()
+        pattern = PATTERN[piece]
+        for l in SQUARELINES[pos]:
+            counts[l] += 1
+            patterns[l] &= pattern
+        i = int(uniform() * len(pieces))
+        piece = pieces[i]
+        pieces[i] = pieces[-1]
+        pieces.pop()
+        result = -result
+
+
+class _Node:
+    # A position of the tree where a piece must be placed (its moves are the
+    # squares) or given (its moves are the pieces), both by the same player,
+    # whose parity tells it apart from the opponent. The statistics of the
+    # children are kept in lists, so that selecting one costs a single pass:
+    # their mean reward for the player acting here and the inverse square root
+    # of their visits.
+    __slots__ = ('placing', 'parity', 'result', 'untried', 'moves', 'children', 'means', 'factors', 'visits', 'reward')
+
+    def __init__(self, placing, parity, result=None):
+        self.placing = placing
+        self.parity = parity
+        # Result for the player acting here: 1 if it wins right away, 0 for a draw
+        self.result = result
+        # Moves not expanded yet, generated on the first visit
+        self.untried = None
+        self.moves = []
+        self.children = []
+        self.means = []
+        self.factors = []
+        self.visits = 0
+        self.reward = 0.0
+
+
+class MonteCarloSearch:
+    '''Monte Carlo tree search (UCT) for the Quarto game.
+
+    It has the same interface as search.QuartoSearch, 'nodes' counting the
+    playouts. Each move is searched 'movetime' seconds, or until 'playouts'
+    playouts are done if that comes first. Placing a piece and giving the
+    next one are separate levels of the tree, which keeps the number of
+    children of a node small. The tree is kept between moves: the subtree of
+    the position reached after the opponent's reply is the root of the next
+    search.
+    '''
+    def __init__(self, movetime=1.0, playouts=None, seed=None, exploration=EXPLORATION):
+        self.movetime = movetime
+        self.playouts = playouts
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.__root = None
+        self.__rootboard = None
+        # Stats about the last search
+        self.nodes = 0
+        self.depth = 0
+        self.value = 0
+
+    def bestmove(self, state, movetime=None):
+        '''Search the best move in a state.
+        Pre: 'state' is a QuartoBitboard of a game still going on.
+        Post: The returned value is a (pos, piece, quarto) triple as returned by
+              search.QuartoSearch.bestmove.
+        '''
+        board = state.copy()
+        deadline = time.perf_counter() + (self.movetime if movetime is None else movetime)
+        self.nodes = 0
+        self.depth = 0
+        self.value = 0
+        if board.piece == NOPIECE:
+            return None, lowest(board.remaining), False
+        pos = board.winningsquare(board.piece)
+        if pos != -1 or board.hasquarto():
+            if pos == -1:
+                pos = lowest(board.empty)
+            remaining = board.remaining & ~(1 << board.piece)
+            self.value = 1
+            return pos, lowest(remaining) if remaining else None, True
+
+        root = self.__reuse(board)
+        self.__root = root
+        self.__rootboard = board
+        lines = board.lines()
+        while self.playouts is None or self.nodes < self.playouts:
+            self.__iterate(root, lines, board.empty, board.remaining, board.piece)
+            if not self.nodes % CHECKPERIOD and time.perf_counter() > deadline:
+                break
+
+        i = _mostvisited(root)
+        pos = root.moves[i]
+        self.value = root.means[i]
+        node = root.children[i]
+        if node.result is not None:
+            return pos, None, False
+        if node.children:
+            return pos, node.moves[_mostvisited(node)], False
+        # Not searched any further: give a safe piece if there is one
+        after = board.copy()
+        after.place(pos)
+        safe = after.remaining & ~after.threats()
+        return pos, lowest(safe if safe else after.remaining), False
+
+    def __reuse(self, board):
+        # The node of 'board' after our last move and the reply of the
+        # opponent, or a new root if it is not in the tree
+        root = self.__root
+        previous = self.__rootboard
+        if root is None:
+            pass
+        elif (previous.zobrist, previous.piece) == (board.zobrist, board.piece):
+            return root
+        elif (previous.empty & ~board.empty).bit_count() == 2:
+            added = previous.empty & ~board.empty
+            first = lowest(added)
+            second = lowest(added & (added - 1))
+            if board.board[first] != previous.piece:
+                first, second = second, first
+            given = board.board[second]
+            # The other squares must not have changed
+            key = previous.zobrist ^ bitboard.ZOBRISTPIECE[previous.piece] ^ bitboard.ZOBRISTPIECE[board.piece]
+            key ^= bitboard.ZOBRIST[first][previous.piece] ^ bitboard.ZOBRIST[second][given]
+            if key == board.zobrist:
+                node = root
+                for move in (first, given, second, board.piece):
+                    if move not in node.moves:
+                        break
+                    node = node.children[node.moves.index(move)]
+                else:
+                    return node
+        return _Node(True, 0)
+
+    def __iterate(self, root, lines, empty, remaining, piece):
+        # Selection, expansion, playout and backpropagation, from the root
+        # position described by its 'lines', 'empty' squares, 'remaining' pieces
+        # and 'piece' to play, updated on copies along the way down
+        self.nodes += 1
+        rng = self.rng
+        counts = list(lines[0])
+        patterns = list(lines[1])
+        node = root
+        # (node, index of the child chosen) pairs
+        path = []
+        while node.result is None:
+            untried = node.untried
+            if untried is None:
+                # Squares where to place the piece, or pieces to give: only one
+                # of those losing right away when they all do
+                if node.placing:
+                    untried = [pos for pos in range(16) if empty >> pos & 1]
+                else:
+                    safe = remaining & ~_threats(counts, patterns)
+                    untried = [code for code in range(16) if safe >> code & 1] if safe else [lowest(remaining)]
+                node.untried = untried
+            expanding = bool(untried)
+            if expanding:
+                # Expand a random move not tried yet
+                i = int(rng.random() * len(untried))
+                move = untried[i]
+                untried[i] = untried[-1]
+                untried.pop()
+            else:
+                # Child with the best upper confidence bound
+                scale = self.exploration * math.sqrt(math.log(node.visits))
+                bounds = [mean + scale * factor for mean, factor in zip(node.means, node.factors)]
+                i = bounds.index(max(bounds))
+                move = node.moves[i]
+            if node.placing:
+                pattern = PATTERN[piece]
+                for l in SQUARELINES[move]:
+                    counts[l] += 1
+                    patterns[l] &= pattern
+                empty &= ~(1 << move)
+                remaining &= ~(1 << piece)
+                piece = NOPIECE
+            else:
+                piece = move
+            if expanding:
+                if node.placing:
+                    child = _Node(False, node.parity, None if remaining else 0)
+                else:
+                    wins = any(counts[l] == 3 and COMPLETING[patterns[l]] >> piece & 1 for l in _LINES)
+                    child = _Node(True, node.parity ^ 1, 1 if wins else None)
+                node.moves.append(move)
+                node.children.append(child)
+                node.means.append(0.0)
+                node.factors.append(1.0)
+                i = len(node.moves) - 1
+            path.append((node, i))
+            node = node.children[i]
+            if node.visits == 0:
+                break
+
+        # Result for the player acting at the leaf
+        if node.result is not None:
+            result = node.result
+        else:
+            squares = [pos for pos in range(16) if empty >> pos & 1]
+            if node.placing:
+                remaining &= ~(1 << piece)
+                pieces = [code for code in range(16) if remaining >> code & 1]
+                result = playout(counts, patterns, squares, pieces, piece, rng)
+            else:
+                # Give a random piece, then the opponent plays
+                pieces = [code for code in range(16) if remaining >> code & 1]
+                piece = pieces.pop(int(rng.random() * len(pieces)))
+                result = -playout(counts, patterns, squares, pieces, piece, rng)
+        reward = (1 + result) / 2
+        self.depth = max(self.depth, (len(path) + 1) // 2)
+
+        parity = node.parity
+        for parent, i in reversed(path):
+            child = parent.children[i]
+            child.visits += 1
+            child.reward += reward if parent.parity == parity else 1 - reward
+            parent.means[i] = child.reward / child.visits
+            parent.factors[i] = 1 / math.sqrt(child.visits)
+        root.visits += 1
+
+
+def _mostvisited(node):
+    visits = [child.visits for child in node.children]
+    return visits.index(max(visits))
@@ -0,0 +1,94 @@
+# metrics.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import contextlib
+import cProfile
+import json
+import time
+
+# Fields of the turn records added up in the game records
+SUMMED = ('encode', 'wait', 'apply', 'parse', 'think', 'nodes', 'tableprobes', 'tablehits')
+
+
+class Metrics:
+    '''Measures of the games played by a component, written as JSON lines.
+
+    Each game gets a record per turn and a summary record at its end, only
+    written when the game ends. Without a 'path', nothing is kept, so that
+    measuring costs next to nothing when it is disabled.
+    '''
+    def __init__(self, path=None, component=None):
+        self.component = component
+        self.__file = None if path is None else open(path, 'a')
+        self.__games = 0
+
+    @property
+    def enabled(self):
+        return self.__file is not None
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def game(self):
+        '''New GameMetrics for a game starting now.'''
+        self.__games += 1
+        return GameMetrics(self, self.__games)
+
+    def write(self, records):
+        for record in records:
+            self.__file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.__file.flush()
+
+
+class GameMetrics:
+    '''Measures of one game (see Metrics.game).'''
+    def __init__(self, metrics, number):
+        self.__metrics = metrics
+        self.__number = number
+        self.__turns = [] if metrics.enabled else None
+        self.__start = time.perf_counter()
+
+    def turn(self, **fields):
+        '''Record the measures of a turn, durations being in seconds.'''
+        if self.__turns is not None:
+            record = {'event': 'turn', 'component': self.__metrics.component, 'game': self.__number, 'turn': len(self.__turns)}
+            record.update(fields)
+            self.__turns.append(record)
+
+    def end(self, **fields):
+        '''Write the records of the game followed by its summary, with the sums of the
+        SUMMED fields of its turns, the nodes per second and the hit rate of the table.'''
+        if self.__turns is None:
+            return
+        record = {'event': 'game', 'component': self.__metrics.component, 'game': self.__number, 'turns': len(self.__turns),
+                  'seconds': time.perf_counter() - self.__start}
+        for field in SUMMED:
+            values = [turn[field] for turn in self.__turns if turn.get(field) is not None]
+            if values:
+                record[field] = sum(values)
+        if record.get('think') and 'nodes' in record:
+            record['nps'] = record['nodes'] / record['think']
+        if record.get('tableprobes'):
+            record['tablehitrate'] = record.get('tablehits', 0) / record['tableprobes']
+        record.update(fields)
+        self.__metrics.write(self.__turns + [record])
+        self.__turns = []
+
+
+@contextlib.contextmanager
+def profiled(path):
+    '''Run the body under cProfile and dump the stats in 'path' (see pstats), or
+    just run it if 'path' is None.'''
+    if path is None:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
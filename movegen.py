@@ -0,0 +1,148 @@
+# movegen.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import bitboard
+from bitboard import lowest
+
+# Squares lying on three lines (diagonals) first, then the others
+SQUAREORDER = tuple(sorted(range(16), key=lambda s: -sum(s in line for line in bitboard.LINES)))
+# Killer moves kept for each number of empty squares and piece to place
+KILLERS = 2
+# Plies left to search from which the pieces of a square are ordered by history
+HISTORYDEPTH = 4
+
+# Piece codes of the masks of the first and of the last eight pieces
+LOWPIECES = tuple(tuple(piece for piece in range(8) if mask >> piece & 1) for mask in range(256))
+HIGHPIECES = tuple(tuple(piece + 8 for piece in range(8) if mask >> piece & 1) for mask in range(256))
+
+
+class MoveOrdering:
+    '''Killer moves and history scores of a search.
+
+    A move causing a cutoff becomes a killer of the positions with as many
+    empty squares (all at the same ply from the root) and the same piece to
+    place, and gets depth * depth more history score. Both are kept across
+    the iterations of iterative deepening and from move to move, age()
+    halving the scores between moves so that the new ones weigh more.
+    '''
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.killers = [[] for _ in range(17 * 16)]
+        self.history = [0] * 256
+
+    def age(self):
+        self.history = [score >> 1 for score in self.history]
+
+    def cutoff(self, board, move, depth):
+        '''Record that the (pos, piece) 'move' caused a cutoff in a search of 'depth'
+        plies of the QuartoBitboard 'board'.'''
+        killers = self.killers[board.empty.bit_count() << 4 | board.piece]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLERS:]
+        pos, piece = move
+        if piece is not None:
+            self.history[pos << 4 | piece] += depth * depth
+
+
+def _pieces(mask):
+    # Piece codes of a mask, lowest first
+    return LOWPIECES[mask & 255] + HIGHPIECES[mask >> 8]
+
+
+def _givable(board, move):
+    # Whether the (pos, piece) 'move' can be played in 'board' without giving
+    # a piece that wins right away
+    pos, piece = move
+    if not board.empty >> pos & 1 or piece is None or piece == board.piece or not board.remaining >> piece & 1:
+        return False
+    return not board.threatsafter(pos) >> piece & 1
+
+
+def squares(board, ordering=None, hashmove=None, depth=None, checkwin=True):
+    '''Generator of the moves of a position, best first, grouped by square.
+    Pre: 'board' is a QuartoBitboard with a piece to place and 'hashmove' a move
+         of that position or None. The board may be changed by the caller
+         between two groups, as long as it is restored before the next one.
+    Post: It yields (pos, pieces) pairs, 'pieces' being the codes of the pieces
+          to give after placing on 'pos' (None when no piece is left). A move
+          completing a Quarto is the only one yielded if there is one (not
+          looked for if 'checkwin' is False). Otherwise, 'hashmove' comes
+          first, then the moves giving a safe piece (the others lose right
+          away): on the squares leaving a line of three pieces sharing an
+          attribute, which restrict the pieces the opponent can give, then the
+          killers and the other squares. The pieces of a square are ordered by
+          history score when the search has at least HISTORYDEPTH plies to go
+          ('depth', None for always). A single losing move is yielded when
+          there is no other. Without 'ordering' (a MoveOrdering), the safe
+          moves come in the order of the squares (SQUAREORDER) and of the pieces.
+    '''
+    if checkwin:
+        pos = board.winningsquare(board.piece)
+        if pos != -1:
+            remaining = board.remaining & ~(1 << board.piece)
+            yield pos, (lowest(remaining) if remaining else None,)
+            return
+    done = []
+    if hashmove is not None:
+        done.append(hashmove)
+        yield hashmove[0], (hashmove[1],)
+
+    # The squares leaving a threat, the killers and the other squares, the safe
+    # pieces of a square being computed when it comes
+    empty = board.empty
+    tiers = (empty,)
+    history = None
+    if ordering is not None:
+        threatening = board.threatening()
+        tiers = (threatening, empty & ~threatening)
+        if depth is None or depth >= HISTORYDEPTH:
+            history = ordering.history
+    losing = None
+    found = bool(done)
+    remaining = board.remaining & ~(1 << board.piece)
+    for index, tier in enumerate(tiers):
+        if index == 1:
+            for move in ordering.killers[empty.bit_count() << 4 | board.piece]:
+                if move not in done and tier >> move[0] & 1 and _givable(board, move):
+                    done.append(move)
+                    found = True
+                    yield move[0], (move[1],)
+        for pos in SQUAREORDER:
+            if not tier >> pos & 1:
+                continue
+            if not remaining:
+                found = True
+                if (pos, None) not in done:
+                    yield pos, (None,)
+                continue
+            safe = remaining & ~board.threatsafter(pos)
+            if not safe:
+                # A move losing right away is only worth trying when all the others do
+                if losing is None:
+                    losing = (pos, lowest(remaining))
+                continue
+            found = True
+            for move in done:
+                if move[0] == pos and move[1] is not None:
+                    safe &= ~(1 << move[1])
+            if not safe:
+                continue
+            if history is not None and safe & (safe - 1):
+                yield pos, sorted(_pieces(safe), key=lambda piece: -history[pos << 4 | piece])
+            else:
+                yield pos, _pieces(safe)
+    if not found and losing is not None:
+        yield losing[0], (losing[1],)
+
+
+def generate(board, ordering=None, hashmove=None, checkwin=True):
+    '''Generator of the (pos, piece) moves of a position in the order of squares(),
+    one by one. The board may be changed by the caller between two moves, as
+    long as it is restored before the next one.'''
+    for pos, pieces in squares(board, ordering, hashmove, None, checkwin):
+        for piece in pieces:
+            yield pos, piece
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# openingbook.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import argparse
+import sys
+
+import bitboard
+import search
+import symmetry
+import tablebase
+
+# Same layout as the tablebase files (see tablebase.writetable), the bound of
+# the header being the least number of empty squares of the positions stored
+MAGIC = b'QOB2'
+
+
+class OpeningBookBuilder:
+    '''Search the first positions of the game deeply and write them in an opening book.
+
+    Positions are enumerated ply by ply from the empty board, once per symmetry
+    class, and each one is searched with the given time.
+    '''
+    def __init__(self, plies, movetime=10.0, verbose=False):
+        self.plies = plies
+        self.verbose = verbose
+        self.positions = {}
+        self.__search = search.QuartoSearch(movetime)
+
+    def build(self):
+        # The piece given at the first move does not matter: start with piece 0
+        board = bitboard.QuartoBitboard(currentPlayer=0)
+        board.give(0)
+        level = [board]
+        for ply in range(self.plies):
+            following = {}
+            for i, board in enumerate(level):
+                key, transform = symmetry.canonical(board)
+                pos, piece, quarto = self.__search.bestmove(board)
+                self.positions[key] = (self.__search.value, symmetry.tocanonical(transform, pos, piece))
+                if self.verbose:
+                    print(' Ply {}: {}/{} positions searched'.format(ply, i + 1, len(level)), end='\r')
+                if ply + 1 < self.plies:
+                    self._expand(board, following)
+            level = list(following.values())
+            if self.verbose:
+                print()
+
+    def _expand(self, board, following):
+        # Add the positions following 'board' where the game goes on
+        empty = board.empty
+        for pos in range(16):
+            if not empty >> pos & 1:
+                continue
+            board.place(pos)
+            pieces = board.remaining & ~board.threats()
+            while pieces:
+                piece = bitboard.lowest(pieces)
+                pieces &= pieces - 1
+                board.give(piece)
+                key = symmetry.canonical(board)[0]
+                if key not in following:
+                    following[key] = board.copy()
+            board.unplace(pos)
+
+    def write(self, path):
+        '''Write the positions searched in an opening book file.'''
+        tablebase.writetable(path, MAGIC, 16 - self.plies + 1, self.positions)
+
+
+class OpeningBook(tablebase.PositionTable):
+    '''Opening book written by OpeningBookBuilder.'''
+    def __init__(self, path):
+        super().__init__(path, MAGIC)
+        self.minempty = self.bound
+
+    def _covers(self, size):
+        return size >= self.minempty
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build a Quarto opening book')
+    parser.add_argument('path', help='opening book file to write')
+    parser.add_argument('--plies', help='number of moves placing a piece covered by the book (default: 2)', type=int, default=2)
+    parser.add_argument('--movetime', help='time to search each position in seconds (default: 10)', type=float, default=10.0)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+    builder = OpeningBookBuilder(args.plies, args.movetime, args.verbose)
+    builder.build()
+    builder.write(args.path)
+    print('{} positions written to {}.'.format(len(builder.positions), args.path), file=sys.stderr)
@@ -0,0 +1,128 @@
+# parallel.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+from concurrent.futures import ProcessPoolExecutor, wait
+import multiprocessing
+import os
+import time
+
+import search
+import transposition
+
+# Workers stop that many seconds before the deadline, so that their results
+# reach the client in time
+MARGIN = 0.05
+
+# Set in each worker process by _initworker
+_search = None
+_alpha = None
+
+
+def _initworker(alpha, tablesize):
+    global _search, _alpha
+    _search = search.QuartoSearch(tablesize=tablesize)
+    _alpha = alpha
+
+
+def _ready():
+    return os.getpid()
+
+
+def _searchmoves(board, moves, depth, budget):
+    # Search a share of the root moves, starting each one with the best value
+    # found so far by all the workers. Returns the (move, value, exact) triples
+    # of the moves searched before the deadline and the number of nodes. A value
+    # is not exact but an upper bound when it does not beat the alpha it started
+    # with.
+    _search.start(budget - MARGIN)
+    values = []
+    try:
+        for move in moves:
+            alpha = _alpha.value
+            value = _search.rootvalue(board, move, depth, alpha, search.INFINITY)
+            values.append((move, value, value > alpha))
+            if value > alpha:
+                with _alpha.get_lock():
+                    if value > _alpha.value:
+                        _alpha.value = value
+    except search.SearchTimeout:
+        pass
+    return values, _search.nodes
+
+
+class ParallelSearch:
+    '''Iterative deepening search splitting the root moves across processes.
+
+    It has the same interface as search.QuartoSearch. At each depth, the root
+    moves are dealt to the workers of a process pool started once, and the
+    best value found so far is shared through a multiprocessing.Value used as
+    the alpha bound of the moves that are not searched yet.
+    '''
+    def __init__(self, movetime=1.0, workers=None, tablesize=transposition.DEFAULT_SIZE):
+        self.movetime = movetime
+        self.workers = workers or os.cpu_count()
+        self.__alpha = multiprocessing.Value('i', -search.INFINITY)
+        # Each worker has its own transposition table, kept between moves
+        self.__executor = ProcessPoolExecutor(
+            self.workers, initializer=_initworker, initargs=(self.__alpha, tablesize // self.workers)
+        )
+        # Start the workers now rather than during the first move
+        wait([self.__executor.submit(_ready) for _ in range(self.workers)])
+        self.__search = search.QuartoSearch(tablesize=0)
+        # Stats about the last search
+        self.nodes = 0
+        self.depth = 0
+        self.value = 0
+
+    def close(self):
+        self.__executor.shutdown(cancel_futures=True)
+
+    def bestmove(self, state, movetime=None):
+        '''Search the best move in a state (see search.QuartoSearch.bestmove).'''
+        board = state.copy()
+        deadline = time.perf_counter() + (self.movetime if movetime is None else movetime)
+        local = self.__search
+        local.start(0)
+        self.nodes = 0
+        self.depth = 0
+        self.value = 0
+        move = local.immediatemove(board)
+        if move is not None:
+            self.value = local.value
+            return move
+        # A single move is searched as well, for its value
+        moves = local.rootmoves(board)
+        best = moves[0]
+        for depth in range(1, board.empty.bit_count() + 1):
+            self.__alpha.value = -search.INFINITY
+            # Deal the moves round-robin, so that each worker starts with good ones
+            shares = [moves[i::self.workers] for i in range(self.workers)]
+            futures = [
+                self.__executor.submit(_searchmoves, board, share, depth, deadline - time.perf_counter())
+                for share in shares if share
+            ]
+            done, pending = wait(futures, timeout=max(0, deadline - time.perf_counter()))
+            for future in pending:
+                future.cancel()
+            scores = {}
+            exact = []
+            for future in done:
+                values, nodes = future.result()
+                for move, value, isexact in values:
+                    scores[move] = value
+                    if isexact:
+                        exact.append(move)
+                self.nodes += nodes
+            # An unfinished iteration is only used if it searched the best move of
+            # the previous one, as QuartoSearch does
+            if best in scores and exact:
+                best = max(exact, key=lambda move: scores[move])
+                self.value = scores[best]
+            if len(scores) < len(moves):
+                break
+            self.depth = depth
+            moves.sort(key=lambda move: -scores[move])
+            if abs(self.value) > search.SCORE:
+                break
+        return best + (False,)
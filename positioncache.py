@@ -0,0 +1,135 @@
+# positioncache.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import sqlite3
+import time
+
+# Entries kept in a file by default, the least recently used ones being evicted
+DEFAULT_ENTRIES = 1000000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS positions (
+    key BLOB PRIMARY KEY,
+    size INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    flag INTEGER NOT NULL,
+    move INTEGER,
+    used INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS positionsused ON positions (used);
+'''
+
+
+def _tokey(key):
+    return key.to_bytes(12, 'little')
+
+
+def _encodemove(move):
+    # A (pos, piece) move as pos << 5 | piece, 16 standing for no piece
+    if move is None:
+        return None
+    pos, piece = move
+    return pos << 5 | (16 if piece is None else piece)
+
+
+def _decodemove(move):
+    if move is None:
+        return None
+    piece = move & 31
+    return move >> 5, None if piece == 16 else piece
+
+
+class PositionCache:
+    '''Cache of search results in an SQLite file shared by processes and games.
+
+    Entries are the (depth, value, flag, move) results of searches, as in the
+    transposition table, keyed by the canonical key of their position (see
+    symmetry.canonical), the move being in the coordinates of the
+    representative. The file is in WAL mode, so that readers neither block
+    each other nor the writer. New entries are kept in memory and written in
+    a single transaction by flush, which also evicts the least recently used
+    entries beyond 'maxentries'.
+    '''
+    def __init__(self, path, maxentries=DEFAULT_ENTRIES):
+        self.maxentries = maxentries
+        # Used from one thread at a time, but not always the same one (see game.playsessions)
+        self.__db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.__db.execute('PRAGMA journal_mode=WAL')
+        self.__db.execute('PRAGMA synchronous=NORMAL')
+        self.__db.executescript(SCHEMA)
+        # Entries not written yet, and keys read since the last flush
+        self.__pending = {}
+        self.__used = set()
+
+    def close(self):
+        if self.__db is not None:
+            self.flush()
+            self.__db.close()
+            self.__db = None
+
+    def __len__(self):
+        return self.__db.execute('SELECT COUNT(*) FROM positions').fetchone()[0] + len(self.__pending)
+
+    def get(self, key):
+        '''Look a canonical key up.
+        Pre: -
+        Post: The returned value is the (depth, value, flag, move) entry stored for
+              'key', or None if there is none.
+        '''
+        entry = self.__pending.get(key)
+        if entry is not None:
+            return entry[1:]
+        row = self.__db.execute('SELECT depth, value, flag, move FROM positions WHERE key = ?', (_tokey(key),)).fetchone()
+        if row is None:
+            return None
+        self.__used.add(key)
+        return row[0], row[1], row[2], _decodemove(row[3])
+
+    def put(self, key, depth, value, flag, move=None):
+        '''Store the result of a search of 'depth' plies for the canonical 'key', unless
+        a deeper one is known. It is written by the next flush.'''
+        pending = self.__pending.get(key)
+        if pending is None or depth >= pending[1]:
+            # The number of empty squares is in the low 16 bits of the key
+            self.__pending[key] = (16 - (key & 0xFFFF).bit_count(), depth, value, flag, move)
+
+    def entries(self, limit=None, minsize=0):
+        '''Iterator on the (key, depth, value, flag, move) entries of positions with at least
+        'minsize' empty squares, the most recently used first, up to 'limit' of them.'''
+        rows = self.__db.execute(
+            'SELECT key, depth, value, flag, move FROM positions WHERE size >= ? ORDER BY used DESC LIMIT ?',
+            (minsize, -1 if limit is None else limit)
+        )
+        for key, depth, value, flag, move in rows:
+            yield int.from_bytes(key, 'little'), depth, value, flag, _decodemove(move)
+
+    def flush(self):
+        '''Write the new entries and the use of those read, then evict the least
+        recently used entries beyond 'maxentries', in a single transaction.'''
+        if not self.__pending and not self.__used:
+            return
+        now = time.time_ns()
+        db = self.__db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.executemany(
+                'INSERT INTO positions (key, size, depth, value, flag, move, used) VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET depth = excluded.depth, value = excluded.value, flag = excluded.flag, '
+                'move = excluded.move, used = excluded.used WHERE excluded.depth >= positions.depth',
+                [
+                    (_tokey(key), size, depth, value, flag, _encodemove(move), now)
+                    for key, (size, depth, value, flag, move) in self.__pending.items()
+                ]
+            )
+            db.executemany('UPDATE positions SET used = ? WHERE key = ?', [(now, _tokey(key)) for key in self.__used])
+            excess = db.execute('SELECT COUNT(*) FROM positions').fetchone()[0] - self.maxentries
+            if excess > 0:
+                db.execute('DELETE FROM positions WHERE key IN (SELECT key FROM positions ORDER BY used LIMIT ?)', (excess,))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        self.__pending = {}
+        self.__used = set()
@@ -0,0 +1,211 @@
+# search.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import time
+
+import bitboard
+from bitboard import lowest
+import movegen
+import symmetry
+import transposition
+
+# A won position is worth SCORE plus the number of empty squares left before the
+# winning placement, so that faster wins are preferred. Unfinished lines at the
+# search horizon are worth 0, as draws are.
+SCORE = 100
+INFINITY = 1000
+
+# Positions with at least that many empty squares are stored in the transposition
+# table under the key of their symmetry class. Symmetric transpositions are
+# mostly found in the opening, and canonicalizing costs more than a few nodes.
+CANONICALSIZE = 12
+
+
+class SearchTimeout(Exception):
+    '''Exception raised when a search goes beyond its deadline.'''
+    pass
+
+
+class QuartoSearch:
+    '''Iterative deepening alpha-beta (negamax) search for the Quarto game.
+
+    A move places the piece to play and then gives a piece to the opponent. The
+    search only gives safe pieces (that cannot complete a line right away) as
+    long as there are some, since any other piece loses on the spot. Moves are
+    tried in the order of movegen.squares, with killer moves and history
+    scores kept from iteration to iteration unless 'ordering' is False.
+    '''
+    def __init__(self, movetime=1.0, tablesize=transposition.DEFAULT_SIZE, canonicalsize=CANONICALSIZE, table=None, ordering=True):
+        self.movetime = movetime
+        # Kept between moves and games: the positions stored remain valid. It may
+        # be shared with other searches, even in other threads, an entry being
+        # stored with a single assignment.
+        self.table = transposition.TranspositionTable(tablesize) if table is None else table
+        self.canonicalsize = canonicalsize
+        self.ordering = movegen.MoveOrdering() if ordering else None
+        self.deadline = 0
+        # Set from another thread to stop the running search as if out of time
+        self.stopped = False
+        # Stats about the last search
+        self.nodes = 0
+        self.depth = 0
+        self.value = 0
+
+    def bestmove(self, state, movetime=None):
+        '''Search the best move in a state.
+        Pre: 'state' is a QuartoBitboard of a game still going on.
+        Post: The returned value is a (pos, piece, quarto) triple where 'pos' is the
+              square where to place the piece to play (None for the first move),
+              'piece' the code of the piece to give (None for the last move) and
+              'quarto' whether a Quarto must be announced.
+        '''
+        board = state.copy()
+        self.start(self.movetime if movetime is None else movetime)
+        move = self.immediatemove(board)
+        if move is not None:
+            return move
+        # A single move is searched as well, for its value (see QuartoPlayer.nextmove)
+        moves = self.rootmoves(board)
+        best = moves[0]
+        size = board.empty.bit_count()
+        for depth in range(1, size + 1):
+            scores = {}
+            alpha = -INFINITY
+            try:
+                for move in moves:
+                    value = self.rootvalue(board, move, depth, alpha, INFINITY)
+                    scores[move] = value
+                    if value > alpha:
+                        alpha = value
+                        self.value = value
+                        best = move
+            except SearchTimeout:
+                break
+            self.depth = depth
+            # Search the best moves of this iteration first in the next one
+            moves.sort(key=lambda move: -scores[move])
+            if abs(alpha) > SCORE:
+                break
+        return best + (False,)
+
+    def start(self, movetime):
+        '''Reset the stats and set the deadline of a search lasting 'movetime' seconds.'''
+        self.deadline = time.perf_counter() + movetime
+        if self.ordering is not None:
+            self.ordering.age()
+        self.nodes = 0
+        self.depth = 0
+        self.value = 0
+
+    def immediatemove(self, board):
+        '''Move to play without searching, as a (pos, piece, quarto) triple, or None.'''
+        # First move: all the pieces are equivalent on an empty board
+        if board.piece == bitboard.NOPIECE:
+            return None, lowest(board.remaining), False
+
+        # Win right away, either with a Quarto left on the board by the opponent or
+        # by completing a line with the piece to play
+        empty = board.empty
+        pos = board.winningsquare(board.piece)
+        if pos != -1 or board.hasquarto():
+            if pos == -1:
+                pos = lowest(empty)
+            remaining = board.remaining & ~(1 << board.piece)
+            self.value = SCORE + empty.bit_count()
+            return pos, lowest(remaining) if remaining else None, True
+        return None
+
+    def rootmoves(self, board):
+        '''List of the (pos, piece) moves worth searching in 'board', best first.'''
+        return list(movegen.generate(board, self.ordering))
+
+    def rootvalue(self, board, move, depth, alpha, beta):
+        '''Value of the (pos, piece) 'move' searched 'depth' plies deep in 'board'.
+        Raises SearchTimeout: If the deadline is hit before the end of the search.
+        '''
+        pos, piece = move
+        size = board.empty.bit_count()
+        board.place(pos)
+        try:
+            if piece is None:
+                return 0
+            if board.threats() >> piece & 1:
+                return -(SCORE + size - 1)
+            board.give(piece)
+            return -self._negamax(board, depth - 1, -beta, -alpha)
+        finally:
+            board.unplace(pos)
+
+    def _negamax(self, board, depth, alpha, beta):
+        self.nodes += 1
+        if not self.nodes & 1023 and (self.stopped or time.perf_counter() > self.deadline):
+            raise SearchTimeout()
+        empty = board.empty
+        size = empty.bit_count()
+        if board.threats() >> board.piece & 1:
+            return SCORE + size
+        if size == 1:
+            return 0
+        # Searching more plies than there are empty squares solves the position
+        depth = min(depth, size)
+        if depth == 0:
+            return 0
+
+        # Symmetric positions share their entry near the root, where subtrees are
+        # big enough to pay for the canonicalization
+        transform = None
+        if size >= self.canonicalsize:
+            key, transform = symmetry.canonical(board)
+            key = ~key
+        else:
+            key = board.zobrist
+        hashmove = None
+        entry = self.table.get(key)
+        if entry is not None:
+            _, entrydepth, value, flag, hashmove = entry
+            if entrydepth >= depth:
+                if flag == transposition.EXACT:
+                    return value
+                if flag == transposition.LOWER and value >= beta:
+                    return value
+                if flag == transposition.UPPER and value <= alpha:
+                    return value
+            if hashmove is not None and transform is not None:
+                hashmove = symmetry.fromcanonical(transform, *hashmove)
+
+        originalalpha = alpha
+        best = -INFINITY
+        bestmove = None
+        # The piece to play completes no Quarto here. It is placed once for all
+        # the pieces that can be given after it.
+        for pos, pieces in movegen.squares(board, self.ordering, hashmove, depth, checkwin=False):
+            board.place(pos)
+            for piece in pieces:
+                board.give(piece)
+                value = -self._negamax(board, depth - 1, -beta, -alpha)
+                if value > best:
+                    best = value
+                    bestmove = (pos, piece)
+                    if value > alpha:
+                        alpha = value
+                        if alpha >= beta:
+                            break
+            board.unplace(pos)
+            if alpha >= beta:
+                # One ply from the horizon, all the safe moves are worth 0: the
+                # first one tried causes the cutoff
+                if self.ordering is not None and depth > 1:
+                    self.ordering.cutoff(board, bestmove, depth)
+                break
+
+        if best <= originalalpha:
+            flag = transposition.UPPER
+        elif best >= beta:
+            flag = transposition.LOWER
+        else:
+            flag = transposition.EXACT
+        if bestmove is not None and transform is not None:
+            bestmove = symmetry.tocanonical(transform, *bestmove)
+        self.table.put(key, depth, best, flag, bestmove)
+        return best
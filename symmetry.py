@@ -0,0 +1,111 @@
+# symmetry.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+from itertools import permutations
+
+import bitboard
+
+
+def _preservelines(squares):
+    lines = set(frozenset(line) for line in bitboard.LINES)
+    return set(frozenset(squares[s] for s in line) for line in bitboard.LINES) == lines
+
+
+# The 32 permutations of the squares that map lines on lines. A symmetry is a
+# tuple g such that square i of the transformed board is square g[i] of the
+# original one. They all permute rows and columns and may transpose the board.
+SYMMETRIES = tuple(sorted(set(
+    squares
+    for rows in permutations(range(4))
+    for cols in permutations(range(4))
+    for squares in (
+        tuple(4 * rows[r] + cols[c] for r in range(4) for c in range(4)),
+        tuple(4 * cols[c] + rows[r] for r in range(4) for c in range(4)),
+    )
+    if _preservelines(squares)
+)))
+INVERSESYMMETRIES = tuple(tuple(g.index(s) for s in range(16)) for g in SYMMETRIES)
+
+# OCCUPANCY[i][half][byte] is the occupancy of the board transformed by the
+# symmetry i, read square by square from the most significant bit, for the
+# squares of one half of the original board. Empty squares come first in the
+# key of the representative, so only the symmetries giving the lowest value
+# can lead to it.
+OCCUPANCY = tuple(
+    tuple(
+        tuple(sum(1 << 15 - i for i in range(16) if g[i] >> 3 == half and byte >> (g[i] & 7) & 1) for byte in range(256))
+        for half in range(2)
+    )
+    for g in SYMMETRIES
+)
+
+# The 24 permutations of the attribute bits, as lookup tables on piece codes.
+# Together with complementing attributes (xor with a code), they map a game on
+# an equivalent one.
+ATTRIBUTEMAPS = tuple(
+    tuple(sum((code >> i & 1) << bits[i] for i in range(4)) for code in range(16))
+    for bits in permutations(range(4))
+)
+INVERSEATTRIBUTEMAPS = tuple(tuple(t.index(code) for code in range(16)) for t in ATTRIBUTEMAPS)
+
+
+def canonical(state):
+    '''Find the representative of the equivalence class of a state.
+    Pre: 'state' is a QuartoBitboard.
+    Post: The returned value is a (key, transform) pair. 'key' is an int that is the
+          same for all the states equivalent to 'state': the codes of the pieces of
+          the representative in square order (4 bits each), the piece to play (5 bits,
+          16 if none) and the occupancy of its board (16 bits). 'transform' maps moves
+          of 'state' to moves of the representative (see tocanonical/fromcanonical).
+    '''
+    board = state.board
+    piece = state.piece
+    occupied = ~state.empty & bitboard.FULLBOARD
+    low, high = occupied & 255, occupied >> 8
+    patterns = [table[0][low] | table[1][high] for table in OCCUPANCY]
+    pattern = min(patterns)
+    best = None
+    for index, g in enumerate(SYMMETRIES):
+        if patterns[index] != pattern:
+            continue
+        sequence = [board[s] for s in g]
+        sequence.append(piece)
+        first = next((code for code in sequence if code != bitboard.NOPIECE), 0)
+        # Complementing with the first piece maps it on 0, the lowest code. Then,
+        # keep the permutations of attributes giving the lowest next codes.
+        sequence = [code if code == bitboard.NOPIECE else code ^ first for code in sequence]
+        maps = range(len(ATTRIBUTEMAPS))
+        for code in sequence:
+            if code > 0 and len(maps) > 1:
+                lowest = min(ATTRIBUTEMAPS[m][code] for m in maps)
+                maps = [m for m in maps if ATTRIBUTEMAPS[m][code] == lowest]
+        table = ATTRIBUTEMAPS[maps[0]]
+        key = 0
+        for code in sequence[:16]:
+            if code != bitboard.NOPIECE:
+                key = key << 4 | table[code]
+        key = (key << 5 | (16 if piece == bitboard.NOPIECE else table[sequence[16]])) << 16 | pattern
+        if best is None or key < best[0]:
+            best = (key, (index, first, maps[0]))
+    return best
+
+
+def tocanonical(transform, pos, piece):
+    '''Map the square 'pos' and the piece 'piece' of a state on those of its representative.'''
+    index, first, m = transform
+    if pos is not None:
+        pos = INVERSESYMMETRIES[index][pos]
+    if piece is not None:
+        piece = ATTRIBUTEMAPS[m][piece ^ first]
+    return pos, piece
+
+
+def fromcanonical(transform, pos, piece):
+    '''Map the square 'pos' and the piece 'piece' of a representative back on the state.'''
+    index, first, m = transform
+    if pos is not None:
+        pos = SYMMETRIES[index][pos]
+    if piece is not None:
+        piece = INVERSEATTRIBUTEMAPS[m][piece] ^ first
+    return pos, piece
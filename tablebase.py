@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# tablebase.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import argparse
+import mmap
+import random
+import struct
+import sys
+
+import bitboard
+from bitboard import lowest
+import search
+import symmetry
+
+# File layout: a header (magic, record size, number of empty squares bounding
+# the positions stored and number of slots) followed by an open addressing
+# hash table of records. Each record holds the canonical key of a position
+# (see symmetry.canonical) plus one, its value for the player to play (as
+# given by the search) and its best move in the coordinates of the
+# representative. A null key is an empty slot: the key of the empty board is 0.
+MAGIC = b'QTB2'
+HEADER = struct.Struct('<4sHHQ')
+RECORD = struct.Struct('<12sbB')
+LOADFACTOR = 0.6
+
+
+def _slot(key, slots):
+    return ((key * 0x9E3779B97F4A7C15) >> 64) % slots
+
+
+def writetable(path, magic, bound, positions):
+    '''Write a position file.
+    Pre: 'positions' maps canonical keys on (value, (pos, piece)) pairs, the move being
+         in the coordinates of the representative.
+    Post: The file 'path' holds the positions, with the header 'magic' and 'bound'.
+    '''
+    # At least one slot stays empty, ending the probes of missing positions
+    slots = int(len(positions) / LOADFACTOR) + 1
+    table = bytearray(HEADER.size + slots * RECORD.size)
+    HEADER.pack_into(table, 0, magic, RECORD.size, bound, slots)
+    empty = bytes(RECORD.size)
+    for key, (value, (pos, piece)) in positions.items():
+        slot = _slot(key, slots)
+        while table[HEADER.size + slot * RECORD.size:HEADER.size + (slot + 1) * RECORD.size] != empty:
+            slot = (slot + 1) % slots
+        RECORD.pack_into(table, HEADER.size + slot * RECORD.size, (key + 1).to_bytes(12, 'little'), value, pos << 4 | piece)
+    with open(path, 'wb') as file:
+        file.write(table)
+
+
+class PositionTable:
+    '''Read-only position file, memory mapped so that nothing is read at load time.'''
+    def __init__(self, path, magic):
+        with open(path, 'rb') as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        filemagic, recordsize, self.bound, self.__slots = HEADER.unpack_from(self.__map, 0)
+        if filemagic != magic or recordsize != RECORD.size:
+            self.__map.close()
+            raise ValueError('{} is not a {} file'.format(path, self.__class__.__name__))
+
+    def close(self):
+        self.__map.close()
+
+    def _covers(self, size):
+        '''Whether positions with 'size' empty squares can be in the file.'''
+        return True
+
+    def probe(self, state):
+        '''Look a position up.
+        Pre: 'state' is a QuartoBitboard.
+        Post: The returned value is the (value, pos, piece) triple stored for 'state',
+              with the move mapped back on it, or None if it is not in the file.
+        '''
+        if state.piece == bitboard.NOPIECE or not self._covers(state.empty.bit_count()):
+            return None
+        key, transform = symmetry.canonical(state)
+        target = (key + 1).to_bytes(12, 'little')
+        table = self.__map
+        slot = _slot(key, self.__slots)
+        for _ in range(self.__slots):
+            offset = HEADER.size + slot * RECORD.size
+            stored = table[offset:offset + 12]
+            if stored == target:
+                _, value, move = RECORD.unpack_from(table, offset)
+                pos, piece = symmetry.fromcanonical(transform, move >> 4, move & 15)
+                return value, pos, piece
+            if stored == bytes(12):
+                return None
+            slot = (slot + 1) % self.__slots
+        return None
+
+    def bestmove(self, state):
+        '''Best move for 'state' as a (pos, piece, quarto) triple, or None if it is not in the file.'''
+        entry = self.probe(state)
+        if entry is None:
+            return None
+        return entry[1], entry[2], False
+
+
+class TablebaseBuilder:
+    '''Solve endgame positions exhaustively and write them in a tablebase file.
+
+    The table of all the positions with N empty squares is far too big for
+    Python, even up to symmetry, so the positions come from the endgames
+    reached by random games: each one is solved with its whole subtree, and
+    every position of the subtree is stored once per symmetry class.
+    '''
+    def __init__(self, maxempty):
+        self.maxempty = maxempty
+        self.positions = {}
+
+    def add(self, state):
+        '''Solve a position and all the positions that can follow it.
+        Pre: 'state' is a QuartoBitboard with at most 'maxempty' empty squares and a piece to play.
+        Post: The returned value is the exact value of 'state' for the player to play.
+        '''
+        return self._solve(state.copy())
+
+    def addrandom(self, games, seed=None):
+        '''Add the endgames reached by 'games' random games.'''
+        rng = random.Random(seed)
+        for _ in range(games):
+            board = self._randomendgame(rng)
+            if board is not None:
+                self._solve(board)
+
+    def _randomendgame(self, rng):
+        # Play random moves, giving safe pieces when possible, until only
+        # 'maxempty' squares are left
+        board = bitboard.QuartoBitboard(currentPlayer=0)
+        board.give(rng.randrange(16))
+        while board.empty.bit_count() > self.maxempty:
+            if board.threats() >> board.piece & 1:
+                return None
+            squares = [pos for pos in range(16) if board.empty >> pos & 1]
+            board.place(rng.choice(squares))
+            safe = board.remaining & ~board.threats()
+            pieces = [piece for piece in range(16) if (safe or board.remaining) >> piece & 1]
+            board.give(rng.choice(pieces))
+        return None if board.threats() >> board.piece & 1 else board
+
+    def _solve(self, board):
+        size = board.empty.bit_count()
+        if board.threats() >> board.piece & 1:
+            return search.SCORE + size
+        if size == 1:
+            return 0
+        key, transform = symmetry.canonical(board)
+        if key in self.positions:
+            return self.positions[key][0]
+
+        # The best that can happen is to win on the next turn
+        bound = search.SCORE + size - 2
+        best = -search.INFINITY
+        bestmove = None
+        empty = board.empty
+        for pos in range(16):
+            if not empty >> pos & 1:
+                continue
+            board.place(pos)
+            safe = board.remaining & ~board.threats()
+            if not safe:
+                # Whatever the piece given, the opponent wins with it
+                if -(search.SCORE + size - 1) > best:
+                    best = -(search.SCORE + size - 1)
+                    bestmove = (pos, lowest(board.remaining))
+            while safe:
+                piece = lowest(safe)
+                safe &= safe - 1
+                board.give(piece)
+                value = -self._solve(board)
+                if value > best:
+                    best = value
+                    bestmove = (pos, piece)
+                    if best >= bound:
+                        break
+            board.unplace(pos)
+            if best >= bound:
+                break
+        self.positions[key] = (best, symmetry.tocanonical(transform, *bestmove))
+        return best
+
+    def write(self, path):
+        '''Write the positions solved so far in a tablebase file.'''
+        writetable(path, MAGIC, self.maxempty, self.positions)
+
+
+class Tablebase(PositionTable):
+    '''Endgame tablebase written by TablebaseBuilder.'''
+    def __init__(self, path):
+        super().__init__(path, MAGIC)
+        self.maxempty = self.bound
+
+    def _covers(self, size):
+        return size <= self.maxempty
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build a Quarto endgame tablebase')
+    parser.add_argument('path', help='tablebase file to write')
+    parser.add_argument('--empty', help='maximum number of empty squares (default: 6)', type=int, default=6)
+    parser.add_argument('--games', help='number of random endgames to solve (default: 100)', type=int, default=100)
+    parser.add_argument('--seed', help='seed of the random games', type=int, default=None)
+    args = parser.parse_args()
+    builder = TablebaseBuilder(args.empty)
+    builder.addrandom(args.games, args.seed)
+    builder.write(args.path)
+    print('{} positions written to {}.'.format(len(builder.positions), args.path), file=sys.stderr)
@@ -0,0 +1,44 @@
+# conftest.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import json
+import os
+import random
+import sys
+
+import pytest
+
+# The modules of the game are at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def randommove(state, rng):
+    '''Random valid JSON move (without Quarto announced) in the QuartoState or
+    QuartoBitboard 'state'.'''
+    visible = json.loads(str(state))['visible']
+    move = {}
+    count = len(visible['remainingPieces'])
+    if visible['pieceToPlay'] is not None:
+        move['pos'] = rng.choice([pos for pos, piece in enumerate(visible['board']) if piece is None])
+        count -= 1
+    if count > 0:
+        move['nextPiece'] = rng.randrange(count)
+    return move
+
+
+@pytest.fixture
+def randomgames():
+    '''Function building a generator replaying random games, as gamelog.replay: it
+    yields a (state, move) pair per turn and then applies the move, the 17
+    turns of 'games' games of 'stateclass' being played with the seed 'seed'.'''
+    def play(stateclass, games, seed):
+        rng = random.Random(seed)
+        for _ in range(games):
+            state = stateclass(currentPlayer=rng.randrange(2))
+            for _ in range(17):
+                move = randommove(state, rng)
+                yield state, move
+                state.makemove(move)
+                state.nextPlayer()
+    return play
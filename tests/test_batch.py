@@ -0,0 +1,55 @@
+# test_batch.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import batch
+import bitboard
+
+# 1200 games of 18 positions
+GAMES = 1200
+
+
+@pytest.fixture
+def states(randomgames):
+    states = []
+    for state, move in randomgames(bitboard.QuartoBitboard, GAMES, 6):
+        states.append(state.copy())
+        if state.empty.bit_count() == 1:
+            # The full board, a draw when there is no Quarto on it
+            states.append(state.copy())
+            states[-1].makemove(move)
+    return states
+
+
+def test_evaluate_matches_bitboard(states):
+    boards, remaining, pieces = batch.boards(states)
+    players = np.array([state.currentplayer for state in states])
+    winners, safe, winning = batch.evaluate(boards, remaining, pieces, players)
+    completing = batch.completing(boards)
+    assert (batch.winners(boards, players) == winners).all()
+    assert (batch.safepieces(boards, remaining) == safe).all()
+    assert (batch.winningsquares(boards, pieces) == winning).all()
+
+    for i, state in enumerate(states):
+        # The winner if the player to play announces a Quarto
+        announced = bitboard.QuartoBitboard.frombytes(bitboard.packstate(state.board, state.remaining, state.piece, True, state.currentplayer))
+        winner = announced.winner()
+        assert winners[i] == (batch.DRAW if winner is None else winner)
+        squares = [state.completing(pos) if state.empty >> pos & 1 else 0 for pos in range(16)]
+        assert completing[i].tolist() == squares
+        assert safe[i] == state.remaining & ~state.threats()
+        if state.piece == bitboard.NOPIECE:
+            assert winning[i] == 0
+        else:
+            assert winning[i] == sum(1 << pos for pos in range(16) if squares[pos] >> state.piece & 1)
+            pos = state.winningsquare(state.piece)
+            assert winning[i] >> pos & 1 if pos != -1 else winning[i] == 0
+
+
+def test_winners_for_all_players(states):
+    boards, _, _ = batch.boards(states[:100])
+    assert (batch.winners(boards, 1) == batch.winners(boards, np.ones(len(boards), dtype=np.int8))).all()
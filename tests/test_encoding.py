@@ -0,0 +1,57 @@
+# test_encoding.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import pytest
+
+import bitboard
+import game
+import quarto
+
+STATECLASSES = (quarto.QuartoState, bitboard.QuartoBitboard)
+
+
+def test_packstate_round_trip(randomgames):
+    for state, _ in randomgames(bitboard.QuartoBitboard, 100, 12):
+        for announced in (False, True):
+            packed = bitboard.packstate(state.board, state.remaining, state.piece, announced, state.currentplayer)
+            assert len(packed) == bitboard.STATEFORMAT.size
+            assert bitboard.unpackstate(packed) == (list(state.board), state.remaining, state.piece, announced, state.currentplayer)
+
+
+@pytest.mark.parametrize('data', [b'', b'\x00' * (bitboard.STATEFORMAT.size - 1), b'\x00' * (bitboard.STATEFORMAT.size + 1)])
+def test_unpackstate_checks_the_size(data):
+    with pytest.raises(ValueError):
+        bitboard.unpackstate(data)
+
+
+@pytest.mark.parametrize('stateclass', STATECLASSES)
+@pytest.mark.parametrize('decoder', STATECLASSES)
+def test_state_round_trip(stateclass, decoder, randomgames):
+    # Both classes read the encoding of the other one
+    for state, _ in randomgames(stateclass, 100, 13):
+        decoded = decoder.frombytes(state.tobytes())
+        assert str(decoded) == str(state)
+        assert decoded.tobytes() == state.tobytes()
+
+
+def test_frombytes_restores_the_bitboard(randomgames):
+    for state, _ in randomgames(bitboard.QuartoBitboard, 100, 14):
+        decoded = bitboard.QuartoBitboard.frombytes(state.tobytes())
+        assert decoded.zobrist == state.zobrist
+        assert decoded.lines() == state.lines()
+        assert decoded.threats() == state.threats()
+        assert decoded.winner() == state.winner()
+
+
+def test_move_round_trip(randomgames):
+    for _, move in randomgames(bitboard.QuartoBitboard, 50, 15):
+        for played in (move, dict(move, quarto=True)):
+            packed = bitboard.packmove(played)
+            assert len(packed) == bitboard.MOVEFORMAT.size
+            assert bitboard.unpackmove(packed) == played
+
+
+def test_unpackmove_checks_the_size():
+    with pytest.raises(game.InvalidMoveException):
+        bitboard.unpackmove(b'\x00' * (bitboard.MOVEFORMAT.size + 1))
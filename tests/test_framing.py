@@ -0,0 +1,125 @@
+# test_framing.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import asyncio
+
+import pytest
+
+import game
+
+MESSAGES = ['{"pos": 3, "nextPiece": 0}', '', 'é' * 1000, b'\x00\x01\x7f']
+
+
+class _Socket:
+    # Socket receiving 'chunks' one after the other, then the end of the stream
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.sizes = []
+
+    def recv(self, size):
+        self.sizes.append(size)
+        if not self.chunks:
+            return b''
+        chunk = self.chunks.pop(0)
+        if len(chunk) > size:
+            self.chunks.insert(0, chunk[size:])
+        return chunk[:size]
+
+
+def _payload(message):
+    return message.encode() if isinstance(message, str) else message
+
+
+def _readall(chunks, chunksize=16):
+    reader = game.MessageReader(_Socket(chunks), chunksize)
+    messages = []
+    while True:
+        message = reader.readframe()
+        if message is None:
+            return messages
+        messages.append(message)
+
+
+async def _areadall(chunks):
+    reader = asyncio.StreamReader()
+    for chunk in chunks:
+        reader.feed_data(chunk)
+    reader.feed_eof()
+    messages = []
+    while True:
+        message = await game.readframe(reader)
+        if message is None:
+            return messages
+        messages.append(message)
+
+
+def _both(chunks):
+    # Messages read by the blocking and the asyncio readers
+    return _readall(chunks), asyncio.run(_areadall(chunks))
+
+
+def test_frame_header():
+    assert game.frame('abc') == b'\x00\x00\x00\x03abc'
+    assert game.frame('é') == b'\x00\x00\x00\x02' + 'é'.encode()
+    assert game.frame(b'') == b'\x00\x00\x00\x00'
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 7])
+def test_message_split_across_chunks(size):
+    data = b''.join(game.frame(message) for message in MESSAGES)
+    chunks = [data[i:i + size] for i in range(0, len(data), size)]
+    expected = [_payload(message) for message in MESSAGES]
+    assert _both(chunks) == (expected, expected)
+
+
+def test_messages_in_one_chunk():
+    data = b''.join(game.frame(message) for message in MESSAGES)
+    expected = [_payload(message) for message in MESSAGES]
+    assert _both([data]) == (expected, expected)
+    # The bytes following a message are kept for the next read
+    reader = game.MessageReader(_Socket([game.frame('a') + game.frame('b')[:3], game.frame('b')[3:]]))
+    assert reader.read() == 'a'
+    assert reader.read() == 'b'
+    assert reader.read() is None
+
+
+def test_long_frame_is_read_whole():
+    # A message longer than a chunk is received in a single call once its size is known
+    message = b'x' * 1000
+    sock = _Socket([game.frame(message)])
+    assert game.MessageReader(sock, 16).readframe() == message
+    assert sock.sizes == [16, 988]
+
+
+def test_frame_too_long():
+    header = game.FRAME_HEADER.pack(game.MAX_MESSAGE_SIZE + 1)
+    with pytest.raises(game.FramingError):
+        _readall([header + b'x' * 10])
+    with pytest.raises(game.FramingError):
+        asyncio.run(_areadall([header + b'x' * 10]))
+    # The largest message allowed is only limited by the bytes received
+    header = game.FRAME_HEADER.pack(game.MAX_MESSAGE_SIZE)
+    with pytest.raises(game.FramingError, match='middle'):
+        _readall([header])
+
+
+@pytest.mark.parametrize('end', [1, game.FRAME_HEADER.size - 1, game.FRAME_HEADER.size, game.FRAME_HEADER.size + 2])
+def test_end_of_stream_in_a_frame(end):
+    chunks = [game.frame('first'), game.frame('second')[:end]]
+    with pytest.raises(game.FramingError):
+        _readall(chunks)
+    with pytest.raises(game.FramingError):
+        asyncio.run(_areadall(chunks))
+
+
+def test_end_of_stream_between_frames():
+    assert _both([game.frame('first')]) == ([b'first'], [b'first'])
+    assert _both([]) == ([], [])
+
+
+def test_read_decodes_the_message():
+    reader = game.MessageReader(_Socket([game.frame('é'), game.frame(b'\xff')]))
+    assert reader.read() == 'é'
+    assert reader.read() == '\ufffd'
+    assert reader.read() is None
@@ -0,0 +1,72 @@
+# test_gamelog.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import json
+import random
+
+import bitboard
+import gamelog
+import quarto
+from conftest import randommove
+
+
+def _playgame(server, rng):
+    # Random game applied by the server as the players' JSON strings, with the
+    # fields the game ignores set to values that cannot be encoded; returns
+    # the moves as they were applied
+    applied = []
+    for turn in range(17):
+        move = randommove(server.state, rng)
+        if turn == 0:
+            move['pos'] = 300
+        if turn == 16:
+            move['nextPiece'] = 1000
+        applied.append(server.applymove(json.dumps(move)))
+        server._state.nextPlayer()
+    return applied
+
+
+def test_applied_moves_drop_the_ignored_fields():
+    server = quarto.QuartoServer()
+    applied = _playgame(server, random.Random(21))
+    assert applied[0].keys() == {'nextPiece'}
+    assert applied[-1].keys() == {'pos'}
+    assert all(move.keys() == {'pos', 'nextPiece'} for move in applied[1:-1])
+
+
+def test_recorded_games_replay(tmp_path):
+    rng = random.Random(22)
+    path = str(tmp_path / 'games.log')
+    recorder = gamelog.GameRecorder(path, maxbytes=2000, backups=10)
+    finals = []
+    for game in range(20):
+        server = quarto.QuartoServer()
+        first = server.state.currentplayer
+        applied = _playgame(server, rng)
+        moves = [quarto.QuartoState.movetobytes(move) for move in applied]
+        recorder.record(1e9 + game, first, server.state.winner(), moves, [0.5] * len(moves))
+        finals.append((first, str(server.state), applied))
+    recorder.close()
+    assert len(gamelog.logfiles(path)) > 1
+
+    records = list(gamelog.readlog(path))
+    assert len(records) == len(finals)
+    for game, (record, (first, final, applied)) in enumerate(zip(records, finals)):
+        assert record.start == 1e9 + game and record.first == first
+        assert record.times == [0.5] * len(applied)
+        assert not record.timeout
+        for stateclass in (quarto.QuartoState, bitboard.QuartoBitboard):
+            moves = []
+            for state, move in gamelog.replay(record, stateclass):
+                moves.append(move)
+            # The last move is applied once the replay is over
+            assert moves == applied
+            assert json.loads(str(state))['visible'] == json.loads(final)['visible']
+
+
+def test_truncated_log(tmp_path):
+    path = tmp_path / 'games.log'
+    records = [gamelog.encoderecord(1e9, 0, None, [b'\x01\x02'] * 3, [0.1] * 3) for _ in range(3)]
+    path.write_bytes(gamelog.MAGIC + b''.join(records)[:-2])
+    assert len(list(gamelog.readgames(str(path)))) == 2
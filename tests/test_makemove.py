@@ -0,0 +1,104 @@
+# test_makemove.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import pytest
+
+import bitboard
+import game
+import quarto
+
+STATECLASSES = (quarto.QuartoState, bitboard.QuartoBitboard)
+
+
+def _snapshot(state):
+    snapshot = (str(state), state.tobytes(), state.threats(), state.hasquarto(), state.winner())
+    if isinstance(state, bitboard.QuartoBitboard):
+        snapshot += (state.zobrist, state.lines())
+    return snapshot
+
+
+@pytest.mark.parametrize('stateclass', STATECLASSES)
+def test_unmakemove_restores_the_state(stateclass, randomgames):
+    for state, move in randomgames(stateclass, 200, 2):
+        before = _snapshot(state)
+        token = state.makemove(move)
+        after = _snapshot(state)
+        state.unmakemove(token)
+        assert _snapshot(state) == before
+        # Nothing is left behind: the move can be made again
+        token = state.makemove(move)
+        assert _snapshot(state) == after
+        state.unmakemove(token)
+
+
+@pytest.mark.parametrize('stateclass', STATECLASSES)
+def test_makemove_matches_a_parsed_state(stateclass, randomgames):
+    # What makemove keeps up to date is what a state computes when it is built
+    for state, _ in randomgames(stateclass, 100, 3):
+        assert _snapshot(state) == _snapshot(stateclass.parse(str(state)))
+
+
+def test_state_classes_agree(randomgames):
+    board = None
+    for state, move in randomgames(quarto.QuartoState, 100, 4):
+        if board is None or board.empty == 0:
+            # A new game
+            board = bitboard.QuartoBitboard.parse(str(state))
+        assert str(board) == str(state)
+        assert board.tobytes() == state.tobytes()
+        assert board.threats() == state.threats()
+        assert board.winner() == state.winner()
+        board.makemove(move)
+        board.nextPlayer()
+
+
+def _midgame(stateclass):
+    # Piece 0 is placed on square 5 and piece 2 is to play, 14 pieces being left
+    # to give after it
+    state = stateclass(currentPlayer=0)
+    state.makemove({'nextPiece': 0})
+    state.nextPlayer()
+    state.makemove({'pos': 5, 'nextPiece': 1})
+    state.nextPlayer()
+    return state
+
+
+@pytest.mark.parametrize('stateclass', STATECLASSES)
+@pytest.mark.parametrize('move', [
+    None,
+    [3, 0],
+    {'nextPiece': 0},
+    {'pos': 16, 'nextPiece': 0},
+    {'pos': -1, 'nextPiece': 0},
+    {'pos': '3', 'nextPiece': 0},
+    {'pos': 5, 'nextPiece': 0},
+    {'pos': 3},
+    {'pos': 3, 'nextPiece': 14},
+    {'pos': 3, 'nextPiece': -1},
+    {'pos': 3, 'nextPiece': None},
+    {'pos': 3, 'nextPiece': 0, 'quarto': True},
+])
+def test_invalid_moves_leave_the_state_unchanged(stateclass, move):
+    state = _midgame(stateclass)
+    before = _snapshot(state)
+    with pytest.raises(game.InvalidMoveException):
+        state.makemove(move)
+    assert _snapshot(state) == before
+
+
+@pytest.mark.parametrize('stateclass', STATECLASSES)
+def test_announced_quarto_wins(stateclass):
+    # Pieces 0 to 3 (round and dark) are placed on the first row
+    state = stateclass(currentPlayer=0)
+    state.makemove({'nextPiece': 0})
+    for pos in range(3):
+        state.nextPlayer()
+        state.makemove({'pos': pos, 'nextPiece': 0})
+    state.nextPlayer()
+    token = state.makemove({'pos': 3, 'nextPiece': 0, 'quarto': True})
+    assert state.winner() == state.currentplayer
+    state.unmakemove(token)
+    assert state.winner() == -1
+    assert state.makemove({'pos': 3, 'nextPiece': 0}) is not None
+    assert state.winner() == -1
@@ -0,0 +1,105 @@
+# test_search.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import time
+
+import bitboard
+import game
+import search
+from search import INFINITY, SCORE
+
+
+def _minimax(board):
+    # Value of 'board' for the player to play, trying every move, with the scores
+    # of QuartoSearch
+    size = board.empty.bit_count()
+    if board.threats() >> board.piece & 1:
+        return SCORE + size
+    if size == 1:
+        return 0
+    return max(_movevalue(board, pos, piece) for pos, piece in _moves(board))
+
+
+def _moves(board):
+    # All the (pos, piece) moves, even those giving a piece that completes a line
+    remaining = board.remaining & ~(1 << board.piece)
+    for pos in range(16):
+        if board.empty >> pos & 1:
+            for piece in range(16):
+                if remaining >> piece & 1:
+                    yield pos, piece
+
+
+def _movevalue(board, pos, piece):
+    size = board.empty.bit_count()
+    board.place(pos)
+    try:
+        if board.threats() >> piece & 1:
+            return -(SCORE + size - 1)
+        board.give(piece)
+        return -_minimax(board)
+    finally:
+        board.unplace(pos)
+
+
+def _endgames(randomgames, games, seed, sizes):
+    # Positions with a piece to place, no Quarto on the board and a number of
+    # empty squares in 'sizes'
+    return [
+        state.copy() for state, _ in randomgames(bitboard.QuartoBitboard, games, seed)
+        if state.piece != bitboard.NOPIECE and not state.hasquarto() and state.empty.bit_count() in sizes
+    ]
+
+
+def test_rootvalue_matches_minimax(randomgames):
+    # One search for all the positions: the transposition table is shared
+    engine = search.QuartoSearch()
+    engine.start(float('inf'))
+    for board in _endgames(randomgames, 40, 31, (3, 4, 5)):
+        size = board.empty.bit_count()
+        if board.threats() >> board.piece & 1:
+            continue
+        for pos, piece in _moves(board):
+            expected = _movevalue(board, pos, piece)
+            assert engine.rootvalue(board, (pos, piece), size, -INFINITY, INFINITY) == expected
+            # The value is exact in a window around it
+            value = engine.rootvalue(board, (pos, piece), size, expected - 1, expected + 1)
+            assert value == expected
+
+
+def test_bestmove_matches_minimax(randomgames):
+    for ordering in (True, False):
+        engine = search.QuartoSearch(ordering=ordering)
+        for board in _endgames(randomgames, 60, 32, (2, 3, 4, 5, 6)):
+            expected = _minimax(board)
+            before = board.tobytes()
+            pos, piece, quarto = engine.bestmove(board, float('inf'))
+            assert board.tobytes() == before
+            assert engine.value == expected
+            assert quarto == (expected > SCORE and board.threats() >> board.piece & 1 == 1)
+            if not quarto:
+                assert _movevalue(board, pos, piece) == expected
+
+
+def _checklegal(board, move):
+    # Play the move as the JSON move sent to the server
+    after = board.copy()
+    after.makemove(board.tomove(*move))
+    if move[2]:
+        assert after.winner() == after.currentplayer
+
+
+def test_bestmove_is_legal_within_the_deadline(randomgames):
+    engine = search.QuartoSearch(movetime=0.05, tablesize=2**20)
+    for state, _ in randomgames(bitboard.QuartoBitboard, 3, 33):
+        if state.piece == bitboard.NOPIECE or state.winner() != -1:
+            continue
+        start = time.perf_counter()
+        move = engine.bestmove(state)
+        # The clock is only read every 1024 nodes
+        assert time.perf_counter() - start < 0.05 + 0.5
+        try:
+            _checklegal(state, move)
+        except game.InvalidMoveException as e:
+            raise AssertionError('Invalid move {} in {}: {}'.format(move, state, e))
@@ -0,0 +1,75 @@
+# test_symmetry.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import random
+
+import bitboard
+import symmetry
+
+
+def _transformed(state, squares, attributes, complement):
+    # Equivalent state: square i is square squares[i] of 'state', and each piece
+    # code is complemented then has its attribute bits permuted
+    def mapped(code):
+        return code if code == bitboard.NOPIECE else symmetry.ATTRIBUTEMAPS[attributes][code ^ complement]
+    board = [mapped(state.board[s]) for s in squares]
+    remaining = sum(1 << mapped(code) for code in range(16) if state.remaining >> code & 1)
+    return bitboard.QuartoBitboard.frombytes(bitboard.packstate(board, remaining, mapped(state.piece), False, state.currentplayer))
+
+
+def _states(randomgames, games, seed):
+    # Positions with a piece to place
+    return [state.copy() for state, _ in randomgames(bitboard.QuartoBitboard, games, seed) if state.piece != bitboard.NOPIECE]
+
+
+def test_symmetries_preserve_lines():
+    assert len(symmetry.SYMMETRIES) == 32
+    lines = set(frozenset(line) for line in bitboard.LINES)
+    for g in symmetry.SYMMETRIES:
+        assert set(frozenset(g[s] for s in line) for line in bitboard.LINES) == lines
+
+
+def test_canonical_is_invariant(randomgames):
+    rng = random.Random(4)
+    for state in _states(randomgames, 60, 40):
+        key, _ = symmetry.canonical(state)
+        for _ in range(8):
+            g = rng.choice(symmetry.SYMMETRIES)
+            other = _transformed(state, g, rng.randrange(len(symmetry.ATTRIBUTEMAPS)), rng.randrange(16))
+            assert symmetry.canonical(other)[0] == key
+
+
+def test_canonical_separates_positions(randomgames):
+    # States sharing a key must be equivalent, with as many pieces and the same
+    # numbers of pieces on their lines
+    classes = {}
+    for state in _states(randomgames, 60, 41):
+        key, _ = symmetry.canonical(state)
+        counts, _ = state.lines()
+        signature = (state.empty.bit_count(), sorted(counts), state.hasquarto())
+        assert classes.setdefault(key, signature) == signature
+
+
+def test_moves_map_on_the_representative(randomgames):
+    for state in _states(randomgames, 30, 42):
+        key, transform = symmetry.canonical(state)
+        index, first, attributes = transform
+        representative = _transformed(state, symmetry.SYMMETRIES[index], attributes, first)
+        assert symmetry.canonical(representative)[0] == key
+        remaining = state.remaining & ~(1 << state.piece)
+        for pos in range(16):
+            if not state.empty >> pos & 1:
+                continue
+            for piece in [code for code in range(16) if remaining >> code & 1] or [None]:
+                mapped = symmetry.tocanonical(transform, pos, piece)
+                assert symmetry.fromcanonical(transform, *mapped) == (pos, piece)
+                # The move and its image lead to equivalent states
+                after = state.copy()
+                after.place(pos)
+                image = representative.copy()
+                image.place(mapped[0])
+                if piece is not None:
+                    after.give(piece)
+                    image.give(mapped[1])
+                assert symmetry.canonical(after)[0] == symmetry.canonical(image)[0]
@@ -0,0 +1,43 @@
+# test_threats.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import json
+
+import bitboard
+import quarto
+
+
+def _bruteforce(state):
+    # Codes of the remaining pieces completing a line of three pieces sharing an
+    # attribute, and whether there is a Quarto, scanning the lines of the JSON state
+    visible = json.loads(str(state))['visible']
+    board = visible['board']
+    quarto_ = False
+    deadly = set()
+    for line in bitboard.LINES:
+        pieces = [board[pos] for pos in line if board[pos] is not None]
+        for piece in visible['remainingPieces'] if len(pieces) == 3 else ():
+            if any(len(set(p[attribute] for p in pieces + [piece])) == 1 for attribute in piece):
+                deadly.add(bitboard.encodepiece(piece))
+        if len(pieces) == 4 and any(len(set(p[attribute] for p in pieces)) == 1 for attribute in pieces[0]):
+            quarto_ = True
+    remaining = set(bitboard.encodepiece(piece) for piece in visible['remainingPieces'])
+    return deadly, remaining, quarto_
+
+
+def test_safepieces_matches_a_line_scan(randomgames):
+    for state, _ in randomgames(quarto.QuartoState, 300, 19):
+        deadly, remaining, quarto_ = _bruteforce(state)
+        assert state.threats() & state.remaining == sum(1 << code for code in deadly)
+        assert state.remaining == sum(1 << code for code in remaining)
+        assert state.hasquarto() == quarto_
+        safe = set() if quarto_ else remaining - deadly
+        assert state.safepieces() == sum(1 << code for code in safe)
+
+
+def test_bitboard_threats_match_a_line_scan(randomgames):
+    for state, _ in randomgames(bitboard.QuartoBitboard, 300, 20):
+        deadly, remaining, quarto_ = _bruteforce(state)
+        assert state.remaining & ~state.threats() == sum(1 << code for code in remaining - deadly)
+        assert state.hasquarto() == quarto_
@@ -0,0 +1,47 @@
+# timecontrol.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+# Time kept for the client to read the state and send its move, in seconds
+MARGIN = 0.05
+# Least time given to a search, which always returns a move anyway
+MINIMUM = 0.005
+
+
+def _weight(empty):
+    # Share of the time of a move with 'empty' empty squares: the first moves
+    # are all alike and the last ones are solved quickly, the middle game is
+    # where searching makes a difference
+    if empty >= 14:
+        return 0.5
+    if empty <= 5:
+        return 0.25
+    return 1.0
+
+
+class TimeManager:
+    '''Split the time given by the server between the moves of a game.
+
+    Without any clock from the server, each move is searched 'movetime' seconds.
+    Otherwise, the time left for the game is shared between the moves still to
+    be played by this player (one every other placement), weighted by their
+    number of empty squares, within the time given for the move.
+    '''
+    def __init__(self, movetime=1.0, margin=MARGIN):
+        self.movetime = movetime
+        self.margin = margin
+
+    def allocate(self, empty, clock=None):
+        '''Time to search a move.
+        Pre: 'empty' is the number of empty squares and 'clock' the (movetime, gametime)
+             pair given by the server (see game.GameClient) or None.
+        Post: The returned value is the time to search the move in seconds.
+        '''
+        if clock is None or clock == (None, None):
+            return self.movetime
+        movetime, gametime = clock
+        budget = movetime
+        if gametime is not None:
+            share = gametime * _weight(empty) / sum(_weight(e) for e in range(empty, 0, -2))
+            budget = share if budget is None else min(budget, share)
+        return max(MINIMUM, min(budget - self.margin, budget * 0.9))
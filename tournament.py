@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# tournament.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import math
+import random
+import sys
+
+import arena
+
+# Elo difference of a player scoring 1/(1 + 10**(-difference / ELOSCALE))
+ELOSCALE = 400
+# Width of the confidence intervals, in standard deviations (95%)
+CONFIDENCE = 1.96
+
+
+def expectedscore(elo):
+    '''Expected score of a player 'elo' points stronger than its opponent.'''
+    return 1 / (1 + 10 ** (-elo / ELOSCALE))
+
+
+def sprtllr(wins, draws, losses, elo0, elo1):
+    '''Log-likelihood ratio of the hypothesis elo = 'elo1' against elo = 'elo0'.
+
+    It uses the normal approximation of the score per game (as the usual
+    engine testing tools do), so it is only meaningful after a few games.
+    '''
+    if wins + draws + losses == 0:
+        return 0.0
+    if wins + losses == 0 or draws + losses == 0 or wins + draws == 0:
+        # All the games ended the same way: one more win and one more loss make the
+        # variance positive without changing the score much
+        wins += 1
+        losses += 1
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins + draws / 4) / games - score ** 2
+    score0 = expectedscore(elo0)
+    score1 = expectedscore(elo1)
+    return games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+
+class SPRT:
+    '''Sequential probability ratio test of elo0 against elo1.
+
+    A match is stopped as soon as the results accept one of the hypotheses,
+    with a false positive rate 'alpha' and a false negative rate 'beta'.
+    '''
+    def __init__(self, elo0, elo1, alpha=0.05, beta=0.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+    def status(self, wins, draws, losses):
+        '''The (llr, decision) pair where 'decision' is 'H0', 'H1' or None to go on.'''
+        llr = sprtllr(wins, draws, losses, self.elo0, self.elo1)
+        if llr <= self.lower:
+            return llr, 'H0'
+        if llr >= self.upper:
+            return llr, 'H1'
+        return llr, None
+
+
+class Tournament:
+    '''Tournament between players described as in arena.makeplayer.
+
+    Pairings are played as matches of an even number of games, so that both
+    players move first equally often. Games run in a process pool, and the
+    results feed Elo ratings computed by maximum likelihood.
+    '''
+    def __init__(self, players, workers=None, seed=None, randomplies=0, verbose=False):
+        self.players = players
+        self.workers = workers
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.randomplies = randomplies
+        self.verbose = verbose
+        # (wins, draws, losses) of players[i] against players[j] for i < j
+        self.results = {}
+        self.__games = 0
+        self.__executor = None
+
+    def __enter__(self):
+        if self.workers != 1:
+            self.__executor = ProcessPoolExecutor(self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def record(self, i, j, wins, draws, losses):
+        '''Add results of players[i] against players[j].'''
+        if i > j:
+            i, j, wins, losses = j, i, losses, wins
+        current = self.results.get((i, j), (0, 0, 0))
+        self.results[i, j] = (current[0] + wins, current[1] + draws, current[2] + losses)
+
+    def score(self, i, j):
+        '''(wins, draws, losses) of players[i] against players[j].'''
+        if i < j:
+            return self.results.get((i, j), (0, 0, 0))
+        wins, draws, losses = self.results.get((j, i), (0, 0, 0))
+        return losses, draws, wins
+
+    def play(self, pairings, games):
+        '''Play 'games' games (rounded up to an even number) for each (i, j) pairing.'''
+        games += games % 2
+        tasks = []
+        for i, j in pairings:
+            for _ in range(games):
+                tasks.append((i, j, self.__games))
+                self.__games += 1
+        specs = [(self.players[i], self.players[j]) for i, j, _ in tasks]
+        indices = [index for _, _, index in tasks]
+        args = (specs, [self.seed] * len(tasks), indices, [self.randomplies] * len(tasks))
+        if self.__executor is None:
+            outcomes = map(arena.playseeded, *args)
+        else:
+            outcomes = self.__executor.map(arena.playseeded, *args)
+        for (i, j, _), outcome in zip(tasks, outcomes):
+            winner = outcome['winner']
+            self.record(i, j, winner == 0, winner is None, winner == 1)
+
+    def roundrobin(self, games=2):
+        '''Play 'games' games between each pair of players.'''
+        n = len(self.players)
+        self.play([(i, j) for i in range(n) for j in range(i + 1, n)], games)
+
+    def swiss(self, rounds, games=2):
+        '''Play 'rounds' rounds pairing players with close scores, avoiding rematches
+        when possible. With an odd number of players, the last one sits out a round.'''
+        for round in range(rounds):
+            ratings = self.ratings()
+            order = sorted(range(len(self.players)), key=lambda i: (-self.points(i), -ratings[i][0]))
+            pairings = []
+            while len(order) > 1:
+                i = order.pop(0)
+                # The best ranked opponent not met yet, or the next one otherwise
+                j = next((j for j in order if sum(self.score(i, j)) == 0), order[0])
+                order.remove(j)
+                pairings.append((i, j))
+            self.play(pairings, games)
+            if self.verbose:
+                print(' Round {}: {} games played.'.format(round + 1, len(pairings) * (games + games % 2)), file=sys.stderr)
+
+    def sprt(self, test, baseline, sprt, maxgames, batch=None):
+        '''Play players[test] against players[baseline] until 'sprt' (an SPRT) decides
+        or 'maxgames' games are played.
+        Post: The returned value is the (llr, decision) pair of the last SPRT status.
+        '''
+        batch = batch or 2 * (self.workers or 1)
+        status = (0.0, None)
+        while sum(self.score(test, baseline)) < maxgames:
+            self.play([(test, baseline)], batch)
+            status = sprt.status(*self.score(test, baseline))
+            if self.verbose:
+                print(' {} games: {}-{}-{}, LLR {:.2f} [{:.2f}, {:.2f}]'.format(
+                    sum(self.score(test, baseline)), *self.score(test, baseline), status[0], sprt.lower, sprt.upper
+                ), file=sys.stderr)
+            if status[1] is not None:
+                break
+        return status
+
+    def points(self, i):
+        '''Score of players[i] over all its games.'''
+        return sum(wins + draws / 2 for wins, draws, _ in (self.score(i, j) for j in range(len(self.players)) if j != i))
+
+    def ratings(self, iterations=1000):
+        '''Elo rating of each player with the half width of its confidence interval.
+
+        Ratings maximize the likelihood of the scores (Bradley-Terry model, a draw
+        counting as half a win), averaging 0. Each pair of players that met gets
+        one more virtual draw, so that the ratings stay finite when a player wins
+        or loses all its games. Intervals only use the games of each player, the
+        uncertainty on the ratings of its opponents being ignored.
+        '''
+        n = len(self.players)
+        games = [[0] * n for _ in range(n)]
+        points = [0.0] * n
+        for (i, j), (wins, draws, losses) in self.results.items():
+            played = wins + draws + losses
+            if played:
+                games[i][j] = games[j][i] = played + 1
+                points[i] += wins + draws / 2 + 0.5
+                points[j] += losses + draws / 2 + 0.5
+        # Minorization-maximization on the strengths 10**(elo / ELOSCALE)
+        strengths = [1.0] * n
+        for _ in range(iterations):
+            previous = strengths
+            strengths = [
+                points[i] / sum(games[i][j] / (strengths[i] + strengths[j]) for j in range(n) if games[i][j])
+                if points[i] else strengths[i]
+                for i in range(n)
+            ]
+            scale = math.exp(sum(map(math.log, strengths)) / n)
+            strengths = [strength / scale for strength in strengths]
+            if max(abs(a - b) / b for a, b in zip(strengths, previous)) < 1e-9:
+                break
+        elos = [ELOSCALE * math.log10(strength) for strength in strengths]
+        ratings = []
+        for i in range(n):
+            information = sum(
+                games[i][j] * expectedscore(elos[i] - elos[j]) * (1 - expectedscore(elos[i] - elos[j]))
+                for j in range(n) if games[i][j]
+            )
+            error = CONFIDENCE * ELOSCALE / math.log(10) / math.sqrt(information) if information else math.inf
+            ratings.append((elos[i], error))
+        return ratings
+
+    def standings(self):
+        '''Lines of the table of the players, from the best rated.'''
+        ratings = self.ratings()
+        lines = []
+        for rank, i in enumerate(sorted(range(len(self.players)), key=lambda i: -ratings[i][0])):
+            played = sum(sum(self.score(i, j)) for j in range(len(self.players)) if j != i)
+            lines.append('{:3} {:30} {:+7.1f} +/- {:5.1f} {:6.1f}/{}'.format(
+                rank + 1, self.players[i], ratings[i][0], ratings[i][1], self.points(i), played
+            ))
+        return lines
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Quarto tournament between AI variants')
+    parser.add_argument('players', help="players: 'random', 'search[:movetime]', 'mcts[:movetime]' or 'module.factory[:movetime]'", nargs='+')
+    parser.add_argument('--games', help='games per pairing (default: 2)', type=int, default=2)
+    parser.add_argument('--swiss', help='play that many Swiss rounds instead of a round-robin', type=int, default=None)
+    parser.add_argument('--sprt', help='test the first player against the second one with an SPRT of ELO0 against ELO1', type=float, nargs=2, metavar=('ELO0', 'ELO1'), default=None)
+    parser.add_argument('--alpha', help='false positive rate of the SPRT (default: 0.05)', type=float, default=0.05)
+    parser.add_argument('--beta', help='false negative rate of the SPRT (default: 0.05)', type=float, default=0.05)
+    parser.add_argument('--maxgames', help='maximum number of games of the SPRT (default: 10000)', type=int, default=10000)
+    parser.add_argument('--workers', help='number of processes (default: one per CPU)', type=int, default=None)
+    parser.add_argument('--seed', help='seed of the tournament', type=int, default=None)
+    parser.add_argument('--randomplies', help='number of random moves opening each game (default: 0)', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+    with Tournament(args.players, args.workers, args.seed, args.randomplies, args.verbose) as tournament:
+        if args.sprt is not None:
+            if len(args.players) != 2:
+                parser.error('an SPRT needs exactly two players')
+            test = SPRT(*args.sprt, args.alpha, args.beta)
+            llr, decision = tournament.sprt(0, 1, test, args.maxgames)
+            print('SPRT elo0={} elo1={}: LLR {:.2f} [{:.2f}, {:.2f}], {}'.format(
+                test.elo0, test.elo1, llr, test.lower, test.upper,
+                {'H0': 'H0 accepted', 'H1': 'H1 accepted', None: 'no decision'}[decision]
+            ))
+        elif args.swiss is not None:
+            tournament.swiss(args.swiss, args.games)
+        else:
+            tournament.roundrobin(args.games)
+        print('Seed {}'.format(tournament.seed))
+        for line in tournament.standings():
+            print(line)
@@ -0,0 +1,81 @@
+# transposition.py
+# Author: Bernard Tourneur & Jonathan Miel
+# Version: October 18, 2026
+
+import sys
+
+# Kind of value stored in an entry
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+DEFAULT_SIZE = 64 * 2**20
+
+
+def _entrysize():
+    # Memory taken by one entry: the tuple, its key and its move
+    entry = (2**63, 16, -100, EXACT, (15, 15))
+    return sys.getsizeof(entry) + sys.getsizeof(entry[0]) + sys.getsizeof(entry[4])
+
+
+class TranspositionTable:
+    '''Bounded transposition table.
+
+    Entries are (key, depth, value, flag, move) tuples stored in buckets of two
+    slots: the first one keeps the deepest search seen for the bucket
+    (depth-preferred) and the second one the last search that did not fit in
+    the first one (always-replace). The number of buckets is derived from the
+    'maxsize' budget in bytes.
+    '''
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        # Each bucket costs two slot references and two entries
+        self.__buckets = max(1, maxsize // (2 * (_entrysize() + 8)))
+        self.clear()
+
+    @property
+    def buckets(self):
+        return self.__buckets
+
+    def clear(self):
+        self.__deep = [None] * self.__buckets
+        self.__recent = [None] * self.__buckets
+        # Stats about the table
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def get(self, key):
+        '''Look a key up.
+        Pre: -
+        Post: The returned value is the (key, depth, value, flag, move) entry stored
+              for 'key', or None if there is none.
+        '''
+        self.probes += 1
+        index = key % self.__buckets
+        entry = self.__deep[index]
+        if entry is None or entry[0] != key:
+            entry = self.__recent[index]
+            if entry is None or entry[0] != key:
+                return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, depth, value, flag, move=None):
+        '''Store the result of a search of 'depth' plies for 'key'.'''
+        self.stores += 1
+        index = key % self.__buckets
+        entry = (key, depth, value, flag, move)
+        deep = self.__deep[index]
+        if deep is None or deep[0] == key or depth >= deep[1]:
+            self.__deep[index] = entry
+            if deep is not None and deep[0] != key:
+                self.__recent[index] = deep
+        else:
+            self.__recent[index] = entry
+
+    def entries(self):
+        '''Iterator on the (key, depth, value, flag, move) entries of the table.'''
+        for slots in (self.__deep, self.__recent):
+            for entry in slots:
+                if entry is not None:
+                    yield entry